@@ -0,0 +1,309 @@
+'''
+
+Copyright (C) 2025 Jakub Kamyk
+
+This file is part of DAEDALUS.
+
+DAEDALUS is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+DAEDALUS is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import argparse
+import csv
+import glob
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+from tqdm import tqdm
+
+import src.arfdes.fit_2_reference as fit_2_reference
+import src.arfdes.tools_airfoil as tools_airfoil
+
+logger = logging.getLogger(__name__)
+
+SELIG_PATTERNS = ('*.txt', '*.dat')
+
+SUMMARY_FILE = 'fit_summary.csv'
+
+SUMMARY_COLUMNS = ['file', 'name', 'points', 'error', 'rms', 'evaluations', 'success', 'seconds', 'output', 'message']
+
+def _new_airfoil(reference, file, initial_params=None):
+    """ Airfoil to fit to a reference loaded from file, named after it. """
+    import src.obj.objects2D as objects2D
+
+    airfoil = objects2D.Airfoil()
+    if initial_params:
+        airfoil.params.update(initial_params)
+    airfoil.infos['name'] = reference.infos['name'] or os.path.splitext(os.path.basename(file))[0]
+    airfoil.infos['creation_date'] = date.today().strftime("%Y-%m-%d")
+    airfoil.infos['modification_date'] = date.today().strftime("%Y-%m-%d")
+    return airfoil
+
+def _output_path(file, output_dir):
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(file))[0] + '.arf')
+
+def _write_airfoil(airfoil, file, output_dir, error, overwrite=False):
+    """ Save a fitted airfoil as <file stem>.arf in output_dir, returns the written path. Refuses to replace a file unless overwrite. """
+    airfoil.infos['description'] = f"Fitted to {os.path.basename(file)}, error {error:.4e}"
+    output = _output_path(file, output_dir)
+    with open(output, 'w' if overwrite else 'x') as outfile:
+        outfile.write(tools_airfoil.save_airfoil_to_json(airfoil=airfoil))
+    return output
+
+def _split_existing(files, output_dir, overwrite=False):
+    """
+    (files to fit, summary rows of the skipped ones). A file is skipped when its .arf exists already (unless
+    overwrite) or when an earlier file of the run writes the same .arf, names compared case-insensitively.
+    """
+    todo, skipped, targets = [], [], set()
+    for file in files:
+        output = _output_path(file, output_dir)
+        if output.lower() in targets:
+            reason = f"skipped, {os.path.basename(output)} is written by another file"
+        elif os.path.exists(output) and not overwrite:
+            reason = f"skipped, {os.path.basename(output)} exists (use --overwrite)"
+        else:
+            targets.add(output.lower())
+            todo.append(file)
+            continue
+        logger.warning(f"{os.path.basename(file)}: {reason}")
+        row = dict.fromkeys(SUMMARY_COLUMNS, '')
+        row.update(file=os.path.basename(file), success=False, message=reason)
+        skipped.append(row)
+    return todo, skipped
+
+def _write_summary(rows, output_dir):
+    with open(os.path.join(output_dir, SUMMARY_FILE), 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=SUMMARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def _selig_files(directory, patterns):
+    return sorted({path for pattern in patterns for path in glob.glob(os.path.join(directory, pattern))})
+
+def _reference(file, source=None):
+    """ Reference of a file, from the shared catalog store when source (AirfoilCatalog.store_source()) is given. """
+    if source is not None:
+        from src.utils.airfoil_catalog import reference_from_store
+        return reference_from_store(*source)
+    return tools_airfoil.SeligReference(file)
+
+def fit_file(file, output_dir, initial_params=None, mode="Least squares", coarse_to_fine=False, bounds=None, cached_params=None,
+             start_candidates=None, source=None, overwrite=False):
+    """
+    Fit one Selig coordinate file and write the result as <name>.arf into output_dir, nothing is written when
+    output_dir is None.
+
+    With source the coordinates are read from the memory-mapped store of the directory catalog instead of
+    parsing the file, see AirfoilCatalog.store_source().
+
+    The fit starts from initial_params or the start_candidates entry (fitted params dict) closest to the
+    reference, cached_params skips the optimization and writes those params instead. Returns (summary row, fitted params),
+    the row follows SUMMARY_COLUMNS and params is None if the fit failed. Runs in the worker processes of fit_directory().
+    """
+    from src.arfdes.fit_index import best_start
+
+    row = dict.fromkeys(SUMMARY_COLUMNS, '')
+    row['file'] = os.path.basename(file)
+    start = time.perf_counter()
+    try:
+        reference = _reference(file, source)
+        ref_points = fit_2_reference.reference_points(reference)
+
+        airfoil = _new_airfoil(reference, file, initial_params)
+        if start_candidates and cached_params is None:
+            airfoil.params.update(best_start(airfoil.params, ref_points, start_candidates))
+
+        if cached_params is not None:
+            airfoil.params.update(cached_params)
+            result = None
+        elif coarse_to_fine:
+            result = fit_2_reference.fit_2_reference_schedule(airfoil, reference, bounds=bounds, mode=mode)
+        elif mode == "Least squares":
+            result = fit_2_reference.fit_2_reference_lsq(airfoil, reference, bounds=bounds)
+        else:
+            result = fit_2_reference.fit_2_reference(airfoil, reference, bounds=bounds)
+
+        error = fit_2_reference.fit_error(airfoil.params, ref_points)
+        output = _write_airfoil(airfoil, file, output_dir, error, overwrite) if output_dir is not None else ''
+
+        row.update(name=airfoil.infos['name'], points=len(ref_points), error=error, rms=math.sqrt(error / len(ref_points)),
+                   evaluations=int(result.nfev) if result is not None else 0,
+                   success=cached_params is not None or bool(result is not None and result.accepted),
+                   output=os.path.basename(output), message="cached" if cached_params is not None else "")
+        params = {k: airfoil.params[k] for k in fit_2_reference.FIT_PARAMS} if row['success'] else None
+    except Exception as e:
+        logger.error(f"Fitting {file} failed: {e}")
+        row.update(success=False, message=str(e))
+        params = None
+    row['seconds'] = round(time.perf_counter() - start, 4)
+    return row, params
+
+def _cache_lookup(cache, index, file, source, bounds, settings, start_params):
+    """ fit_index.lookup_fit() of one file, all None if it cannot be read. """
+    from src.arfdes.fit_index import lookup_fit
+
+    try:
+        reference = _reference(file, source)
+    except Exception:
+        return None, None, None, None  # fit_file reports the error
+    return lookup_fit(cache, index, reference, bounds, settings, start_params)
+
+def fit_directory(directory, output_dir=None, patterns=SELIG_PATTERNS, workers=None, initial_params=None,
+                  mode="Least squares", coarse_to_fine=False, bounds=None, use_cache=True, overwrite=False):
+    """
+    Fit every Selig file of a directory in parallel, writing the .arf files and fit_summary.csv into output_dir.
+
+    output_dir defaults to directory itself. Files whose .arf exists already are skipped unless overwrite. With use_cache, files already fitted with the same bounds and
+    settings are taken from the fit cache, the others start from the best of initial_params, a cached fit of
+    the same reference and the fits of the nearest shapes in the fit index; new fits are added to both. Returns the summary rows in file name order.
+
+    The directory is cataloged first, the workers then map its coordinate store instead of parsing the files,
+    so a library is read once and its pages are shared between the processes.
+    """
+    from src.utils.airfoil_catalog import AirfoilCatalog
+
+    output_dir = output_dir or directory
+    os.makedirs(output_dir, exist_ok=True)
+    files = _selig_files(directory, patterns)
+    if not files:
+        logger.warning(f"No Selig files found in {directory}")
+        return []
+    files, skipped = _split_existing(files, output_dir, overwrite)
+
+    catalog = AirfoilCatalog(directory, patterns=patterns)
+    catalog.update()
+    # Files the catalog could not store are parsed by the workers themselves
+    sources = {file: catalog.store_source(file) if os.path.basename(file) in catalog else None for file in files}
+
+    # The cache is only touched here, the worker processes never share its file
+    cache = index = None
+    lookups = dict.fromkeys(files, (None, None, None, None))
+    if use_cache:
+        from src.arfdes.fit_cache import FitCache
+        from src.arfdes.fit_index import FitIndex
+        import src.obj.objects2D as objects2D
+        cache = FitCache()
+        index = FitIndex()
+        settings = fit_2_reference.fit_settings(mode, 1, coarse_to_fine)
+        # Every file starts from the same params, the ones the fit does not touch (the origin) enter the key
+        start_params = dict(objects2D.Airfoil().params, **(initial_params or {}))
+        lookups = {file: _cache_lookup(cache, index, file, sources[file], bounds, settings, start_params) for file in files}
+
+    rows = list(skipped)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for file in files:
+            _, _, cached, candidates = lookups[file]
+            futures[executor.submit(fit_file, file, output_dir, initial_params, mode, coarse_to_fine, bounds, cached, candidates,
+                                    sources[file], overwrite)] = file
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Fitting", unit="airfoil"):
+            row, params = future.result()
+            rows.append(row)
+            file = futures[future]
+            key, ref_digest, cached, _ = lookups[file]
+            if cache is not None and key is not None and params is not None and cached is None:
+                cache.put(key, ref_digest, params, row['error'], row['name'])
+                index.add(_reference(file, sources[file]), params, row['name'])
+    rows.sort(key=lambda row: row['file'])
+
+    if cache is not None:
+        try:
+            cache.save()
+            index.save()
+        except OSError as e:
+            logger.warning(f"Could not write the fit cache: {e}")
+
+    _write_summary(rows, output_dir)
+
+    failed = sum(1 for row in rows if not row['success'])
+    logger.info(f"Fitted {len(rows) - failed} of {len(rows)} airfoils from {directory}, summary in {os.path.join(output_dir, SUMMARY_FILE)}")
+    return rows
+
+def fit_family(directory, output_dir=None, patterns=SELIG_PATTERNS, shared=fit_2_reference.FAMILY_SHARED, initial_params=None, bounds=None,
+               overwrite=False):
+    """
+    Fit every Selig file of a directory as one family (e.g. the sections of a wing), sharing the parameters
+    named in shared between them. Writes the .arf files and fit_summary.csv like fit_directory() and returns
+    the summary rows, the evaluations and seconds of a row are those of the whole family fit.
+
+    The family is only fitted if none of its .arf files exists already, unless overwrite.
+    """
+    output_dir = output_dir or directory
+    os.makedirs(output_dir, exist_ok=True)
+    files = _selig_files(directory, patterns)
+    if not files:
+        logger.warning(f"No Selig files found in {directory}")
+        return []
+    # Leaving out a section would change the shared fit of the others, so any clash stops the whole family
+    _, skipped = _split_existing(files, output_dir, overwrite)
+    if skipped:
+        logger.error(f"Family of {directory} not fitted, {len(skipped)} output files clash")
+        _write_summary(skipped, output_dir)
+        return skipped
+
+    start = time.perf_counter()
+    references = [tools_airfoil.SeligReference(file) for file in files]
+    airfoils = [_new_airfoil(reference, file, initial_params) for reference, file in zip(references, files)]
+    result = fit_2_reference.fit_2_reference_family(airfoils, references, shared=shared, bounds=bounds)
+    seconds = round(time.perf_counter() - start, 4)
+
+    rows = []
+    for airfoil, reference, file in zip(airfoils, references, files):
+        ref_points = fit_2_reference.reference_points(reference)
+        error = fit_2_reference.fit_error(airfoil.params, ref_points)
+        output = _write_airfoil(airfoil, file, output_dir, error, overwrite)
+        rows.append({'file': os.path.basename(file), 'name': airfoil.infos['name'], 'points': len(ref_points), 'error': error,
+                     'rms': math.sqrt(error / len(ref_points)), 'evaluations': int(result.nfev) if result is not None else 0,
+                     'success': bool(result is not None and result.accepted), 'seconds': seconds,
+                     'output': os.path.basename(output), 'message': f"family, shared: {' '.join(shared)}"})
+    _write_summary(rows, output_dir)
+
+    logger.info(f"Fitted a family of {len(rows)} airfoils from {directory}, summary in {os.path.join(output_dir, SUMMARY_FILE)}")
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit every Selig coordinate file of a directory to the parametric airfoil")
+    parser.add_argument('directory', help="directory with Selig .txt/.dat files")
+    parser.add_argument('--out', help="output directory for the .arf files and fit_summary.csv, defaults to the input directory")
+    parser.add_argument('--overwrite', action='store_true', help="replace existing .arf files instead of skipping their inputs")
+    parser.add_argument('--initial', help=".arf file used as initial guess for every fit")
+    parser.add_argument('--mode', choices=fit_2_reference.FIT_MODES, default="Least squares")
+    parser.add_argument('--coarse-to-fine', action='store_true', help="fit through the coarse-to-fine schedule")
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--no-cache', action='store_true', help="neither read nor update the fit cache and fit index")
+    parser.add_argument('--family', action='store_true', help="fit all files together as one family of sections")
+    parser.add_argument('--shared', nargs='*', default=fit_2_reference.FAMILY_SHARED, help="parameters shared by a family fit")
+    args = parser.parse_args(argv)
+
+    initial_params = None
+    if args.initial:
+        try:
+            initial_params = dict(tools_airfoil.load_airfoil_from_json(args.initial)[0].params)
+        except tools_airfoil.AirfoilFileError as e:
+            parser.error(str(e))
+
+    if args.family:
+        fit_family(args.directory, args.out, shared=args.shared, initial_params=initial_params, overwrite=args.overwrite)
+        return
+
+    fit_directory(args.directory, args.out, workers=args.workers, initial_params=initial_params,
+                  mode=args.mode, coarse_to_fine=args.coarse_to_fine, use_cache=not args.no_cache, overwrite=args.overwrite)
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    main()
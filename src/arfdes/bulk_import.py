@@ -0,0 +1,191 @@
+'''
+
+Copyright (C) 2025 Jakub Kamyk
+
+This file is part of DAEDALUS.
+
+DAEDALUS is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+DAEDALUS is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import glob
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+import src.arfdes.fit_2_reference as fit_2_reference
+import src.arfdes.tools_airfoil as tools_airfoil
+
+logger = logging.getLogger(__name__)
+
+IMPORT_PATTERNS = ('*.arf', '*.txt', '*.dat')
+
+def import_files_in(directory, patterns=IMPORT_PATTERNS):
+    """ Airfoil (.arf) and coordinate files of a directory, in name order. """
+    return sorted({path for pattern in patterns for path in glob.glob(os.path.join(directory, pattern))})
+
+def is_airfoil_file(file):
+    """ True for .arf files, the other files are read as coordinates. """
+    return file.lower().endswith('.arf')
+
+class FitStore:
+    """
+    The fit cache and fit index of an import that fits its coordinate files.
+
+    Coordinate files fitted before with the default bounds and settings (e.g. by batch_fit) are taken from the
+    cache, the others start from the nearest fitted shapes, see fit_index.lookup_fit().
+    """
+    def __init__(self):
+        from src.arfdes.fit_cache import FitCache
+        from src.arfdes.fit_index import FitIndex
+
+        self.cache = FitCache()
+        self.index = FitIndex()
+        self.settings = fit_2_reference.fit_settings()
+        self.changed = False
+
+    def lookup(self, reference, start_params):
+        """ (key, reference digest, cached params, start candidates) of a reference fitted from start_params. """
+        from src.arfdes.fit_index import lookup_fit
+
+        return lookup_fit(self.cache, self.index, reference, None, self.settings, start_params)
+
+    def put(self, key, ref_digest, reference, params, error, name):
+        self.cache.put(key, ref_digest, params, error, name)
+        self.index.add(reference, params, name)
+        self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+        try:
+            self.cache.save()
+            self.index.save()
+        except OSError as e:
+            logger.warning(f"Could not write the fit cache: {e}")
+
+def import_file(file):
+    """
+    Airfoil of an .arf file, with its geometry constructed so the caller only has to insert it, or the reference
+    of a coordinate file. Raises AirfoilFileError on unreadable .arf files and OSError or ValueError on
+    unreadable coordinate files.
+    """
+    if not is_airfoil_file(file):
+        return tools_airfoil.SeligReference(file)
+    airfoil, _ = tools_airfoil.load_airfoil_from_json(file)
+    airfoil.update()
+    return airfoil
+
+class ImportThread(QThread):
+    """
+    Imports a list of files outside the GUI thread.
+
+    .arf files are loaded and coordinate files read as references on a thread pool, both only parse files.
+    With fit the coordinate files are fitted with the parametric airfoil instead, in worker processes as
+    batch_fit does and through the fit cache when use_cache.
+
+    progress(done, total, file) is emitted per finished file, then imported(airfoils, references, failures) once
+    with the airfoils in the order of the files, (file, reference) of the coordinate files read as references and
+    (file, message) of those that failed; cancelled() if cancel() was called.
+    """
+    progress = pyqtSignal(int, int, str)
+    imported = pyqtSignal(object, object, object)
+    cancelled = pyqtSignal()
+
+    def __init__(self, files, workers=None, fit=False, use_cache=True, parent=None):
+        super().__init__(parent)
+        self.files = list(files)
+        self.workers = workers
+        self.fit = fit
+        self.use_cache = use_cache
+        self._cancel = False
+        self._done = 0
+
+    def cancel(self):
+        self._cancel = True
+
+    def _finished(self, file):
+        self._done += 1
+        self.progress.emit(self._done, len(self.files), os.path.basename(file))
+
+    def _read(self, files, airfoils, references, failures):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(import_file, file): file for file in files}
+            for future in as_completed(futures):
+                file = futures[future]
+                try:
+                    (airfoils if is_airfoil_file(file) else references)[file] = future.result()
+                except Exception as e:
+                    logger.error(f"Importing {file} failed: {e}")
+                    failures.append((file, str(e)))
+                self._finished(file)
+                if self._cancel:
+                    executor.shutdown(cancel_futures=True)
+                    return
+
+    def _fit(self, files, airfoils, failures):
+        from src.arfdes.batch_fit import _new_airfoil, fit_file
+
+        store = FitStore() if self.use_cache else None
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {}
+            for file in files:
+                try:
+                    reference = tools_airfoil.SeligReference(file)
+                except (OSError, ValueError) as e:
+                    failures.append((file, str(e)))
+                    self._finished(file)
+                    continue
+                airfoil = _new_airfoil(reference, file)
+                airfoil.infos['description'] = f"Fitted to {os.path.basename(file)}"
+                lookup = store.lookup(reference, airfoil.params) if store is not None else (None, None, None, None)
+                future = executor.submit(fit_file, file, None, cached_params=lookup[2], start_candidates=lookup[3])
+                futures[future] = file, reference, airfoil, lookup
+
+            for future in as_completed(futures):
+                file, reference, airfoil, (key, ref_digest, cached, _) = futures[future]
+                row, params = future.result()
+                if params is None:
+                    failures.append((file, row['message'] or f"Fitting {os.path.basename(file)} did not converge"))
+                else:
+                    airfoil.params.update(params)
+                    airfoil.update()
+                    airfoils[file] = airfoil
+                    if store is not None and cached is None:
+                        store.put(key, ref_digest, reference, params, row['error'], airfoil.infos['name'])
+                self._finished(file)
+                if self._cancel:
+                    executor.shutdown(cancel_futures=True)
+                    break
+
+        if store is not None:
+            store.save()
+
+    def run(self):
+        airfoils, references, failures = {}, {}, []
+        to_read, to_fit = [], []
+        for file in self.files:
+            (to_fit if self.fit and not is_airfoil_file(file) else to_read).append(file)
+        self._read(to_read, airfoils, references, failures)
+        if to_fit and not self._cancel:
+            self._fit(to_fit, airfoils, failures)
+
+        if self._cancel:
+            logger.info("Import cancelled.")
+            self.cancelled.emit()
+            return
+        logger.info(f"Imported {len(airfoils) + len(references)} of {len(self.files)} files")
+        self.imported.emit([airfoils[file] for file in self.files if file in airfoils],
+                           [(file, references[file]) for file in self.files if file in references], failures)
@@ -19,146 +19,693 @@ along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
 
 '''
 import logging
+import os
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QTabWidget, QVBoxLayout, QCheckBox, QLabel, QDialog, QPushButton, QHBoxLayout, QComboBox, QLineEdit, QFormLayout
+    QApplication, QWidget, QTabWidget, QVBoxLayout, QCheckBox, QLabel, QDialog, QPushButton, QHBoxLayout, QComboBox, QLineEdit, QFormLayout,
+    QSpinBox
 )
 logger = logging.getLogger(__name__)
 
-def fit_2_reference(current_airfoil, reference_airfoil, bounds=None):
-    """ Fit the currently selected airfoil to the reference_airfoil by optimizing its parameters. """
+# Parameters the fit works on, the airfoil origin always stays where it is
+FIT_PARAMS = [
+    "chord", "le_thickness", "le_depth", "le_offset", "le_angle",
+    "te_thickness", "te_depth", "te_offset", "te_angle",
+    "ps_fwd_angle", "ps_rwd_angle", "ps_fwd_accel", "ps_rwd_accel",
+    "ss_fwd_angle", "ss_rwd_angle", "ss_fwd_accel", "ss_rwd_accel"
+]
+
+# Coarse-to-fine fitting stages: (reference point stride, relative tolerance ending the stage)
+# A tolerance of None keeps the solver default, the last stage has to match a plain fit.
+# Opt-in: with the orthogonal residual the plain fit is as fast and often closer on the bundled references.
+FIT_SCHEDULE = [
+    (4, 1e-2),
+    (2, 1e-3),
+    (1, None)
+]
+
+# Default relative tolerances of the least-squares fit. The orthogonal distance is exact, so the solver keeps
+# creeping along flat valleys of the parameter space long after the shape has stopped changing visibly.
+FIT_FTOL = 1e-4
+FIT_XTOL = 1e-6
+
+FIT_MODES = ["Least squares", "L-BFGS-B"]
+
+# Parameters a family fit shares between its sections unless told otherwise
+FAMILY_SHARED = ["le_depth", "te_depth"]
+
+# Minimal time between two progress signals of FitThread, in seconds
+PROGRESS_INTERVAL = 0.03
+
+# How often a multi-start fit looks at its cancel flag while its runs are busy, in seconds
+CANCEL_POLL = 0.1
+
+def variable_scales(param_names=FIT_PARAMS):
+    """
+    Typical size of every parameter: angles are degrees, lengths fractions of a unit chord. L-BFGS-B works on
+    params / scale, unscaled its line search gets lost between the two orders of magnitude.
+    """
+    import numpy as np
+
+    return np.array([10.0 if "angle" in k else 0.1 for k in param_names])
+
+class FitCancelled(Exception):
+    """ Raised from a fit callback to stop the optimizer. """
+
+# Status of an optimizer result that stopped on its iteration or evaluation budget
+LBFGSB_BUDGET_STATUS = 1
+LSQ_BUDGET_STATUS = 0
+
+def accept_result(result, improved, budget_status):
+    """
+    Whether the params of a fit result are used, stored as result.accepted: a converged run is accepted, and so
+    is a run stopped by its budget that improved on its start. Callers read result.accepted, the fits only
+    write accepted params to the airfoil.
+    """
+    result.accepted = bool(result.success or (result.status == budget_status and improved))
+    return result.accepted
+
+def default_bounds(param_names=FIT_PARAMS):
+    """ Default search range of every fitted parameter. """
+    bounds = []
+    for k in param_names:
+        if "angle" in k:
+            bounds.append((-90, 90))
+        elif "thickness" in k or "depth" in k or "offset" in k:
+            bounds.append((0, 2))
+        elif k == "chord":
+            bounds.append((0.01, 10))
+        else:
+            bounds.append((-2, 2))
+    return bounds
+
+def reference_points(reference_airfoil):
+    """ Reference coordinates as one (N, 2) array. """
     import numpy as np
-    import math
-    from scipy.interpolate import splprep, splev
-    from scipy.optimize import minimize
 
-    # Prepare reference points (flattened arrays)
     top_ref = np.array(reference_airfoil.top_curve)
     dwn_ref = np.array(reference_airfoil.dwn_curve)
-    # Combine for error calculation
-    ref_points = np.hstack((top_ref, dwn_ref)).T  # shape (N, 2)
-
-    # Parameter names and initial values
-    param_names = [
-        "chord", "le_thickness", "le_depth", "le_offset", "le_angle",
-        "te_thickness", "te_depth", "te_offset", "te_angle",
-        "ps_fwd_angle", "ps_rwd_angle", "ps_fwd_accel", "ps_rwd_accel",
-        "ss_fwd_angle", "ss_rwd_angle", "ss_fwd_accel", "ss_rwd_accel"
-    ]
-    # Fallback for missing params
-    def get_param(k, default=0.0):
-        return current_airfoil.params.get(k, default)
-    initial_params = [get_param(k, 1.0 if "thickness" in k or "depth" in k else 0.0) for k in param_names]
+    return np.hstack((top_ref, dwn_ref)).T
+
+def fit_2_reference(current_airfoil, reference_airfoil, bounds=None, maxiter=200, callback=None, ftol=None):
+    """
+    Fit the currently selected airfoil to the reference_airfoil by optimizing its parameters.
+
+    Minimizes the orthogonal distance error of fit_residuals() with L-BFGS-B and its analytic gradient, in
+    variables scaled by variable_scales(). The objective has kinks where the closest curve of a reference point
+    switches, there the line search can stop short of the convergence test; the best point found is kept anyway
+    and counts as converged when it improved on the start. A run stopped by maxiter is kept if it improved, see
+    accept_result().
+    callback(iteration, objective, params) is called after every iteration, raising FitCancelled from it stops the fit.
+    """
+    import numpy as np
+    from scipy.optimize import minimize
+    from src.obj.airfoil_batch import PARAM_NAMES, params_to_array
+
+    # Prepare reference points, shape (N, 2)
+    ref_points = reference_points(reference_airfoil)
+
+    # Parameter names and initial values, the rest of the row (origin) stays as it is
+    param_names = FIT_PARAMS
+    full = params_to_array([current_airfoil])[0]
+    columns = [PARAM_NAMES.index(k) for k in param_names]
+    scale = variable_scales(param_names)
+    initial_params = full[columns] / scale
 
     # Bounds (adjust as needed)
     if bounds is None:
-        bounds = []
-        for k in param_names:
-            if "angle" in k:
-                bounds.append((-90, 90))
-            elif "thickness" in k or "depth" in k or "offset" in k:
-                bounds.append((0, 2))
-            elif k == "chord":
-                bounds.append((0.01, 10))
-            else:
-                bounds.append((-2, 2))
-
-    def CreateBSpline(const_points):
-        l = len(const_points[0])
-        t = np.linspace(0, 1, l-2, endpoint=True)
-        t = np.append([0,0,0], t)
-        t = np.append(t, [1,1,1])
-        tck = [t, [const_points[0], const_points[1]], 3]
-        u3 = np.linspace(0, 1, max(l*2, 70), endpoint=True)
-        spline = splev(u3, tck)
-        return spline
-
-    def objective_function(p):
-        # Unpack parameters
-        chord, le_thickness, le_depth, le_offset, le_angle, te_thickness, te_depth, te_offset, te_angle, \
-        ps_fwd_angle, ps_rwd_angle, ps_fwd_accel, ps_rwd_accel, ss_fwd_angle, ss_rwd_angle, ss_fwd_accel, ss_rwd_accel = p
-
-        origin_X = 0
-        origin_Y = 0
-
-        # LE control points
-        p_le_start = [origin_X, origin_Y]
-        a0 = math.tan(math.radians(90 + le_angle))
-        a1 = math.tan(math.radians(ps_fwd_angle))
-        a2 = math.tan(math.radians(ss_fwd_angle))
-        b0 = p_le_start[1] - a0 * p_le_start[0]
-        b1 = p_le_start[1] + le_thickness/2 + le_offset - a1 * (p_le_start[0] + le_depth)
-        b2 = p_le_start[1] - le_thickness/2 + le_offset - a2 * (p_le_start[0] + le_depth)
-        p_le_t = [(b1-b0)/(a0-a1), a0*((b1-b0)/(a0-a1))+b0]
-        p_le_d = [(b2-b0)/(a0-a2), a0*((b2-b0)/(a0-a2))+b0]
-        p_le_ps = [origin_X+le_depth, origin_Y+le_thickness/2+le_offset]
-        p_le_ss = [origin_X+le_depth, origin_Y-le_thickness/2+le_offset]
-        le_constr = np.vstack([p_le_ss, p_le_d, p_le_t, p_le_ps]).T
-
-        # TE control points
-        p_te_ps = [origin_X+chord-te_depth, origin_Y+te_thickness/2+te_offset]
-        p_te_ss = [origin_X+chord-te_depth, origin_Y-te_thickness/2+te_offset]
-        p_te_start = [origin_X+chord+te_thickness/2, origin_Y]
-        a3 = math.tan(math.radians(90 + te_angle))
-        a4 = math.tan(math.radians(ps_rwd_angle))
-        a5 = math.tan(math.radians(ss_rwd_angle))
-        b3 = p_te_start[1] - a3 * p_te_start[0]
-        b4 = p_te_start[1] + te_thickness/2 + te_offset - a4 * (p_te_start[0] - te_depth)
-        b5 = p_te_start[1] - te_thickness/2 + te_offset - a5 * (p_te_start[0] - te_depth)
-        p_te_t = [(b4-b3)/(a3-a4), a3*((b4-b3)/(a3-a4))+b3]
-        p_te_d = [(b5-b3)/(a3-a5), a3*((b5-b3)/(a3-a5))+b3]
-        te_constr = np.vstack([p_te_ss, p_te_d, p_te_start, p_te_t, p_te_ps]).T
-
-        # PS control points
-        p_ps_le = p_le_ps
-        p_ps_te = p_te_ps
-        p_ps_1 = [origin_X+ps_fwd_accel, a1*(origin_X+ps_fwd_accel)+b1]
-        p_ps_2 = [p_ps_te[0]-ps_rwd_accel, a4*(p_ps_te[0]-ps_rwd_accel)+b4]
-        ps_constr = np.vstack([p_ps_le, p_ps_1, p_ps_2, p_ps_te]).T
-
-        # SS control points
-        p_ss_le = p_le_ss
-        p_ss_te = p_te_ss
-        p_ss_1 = [origin_X+ss_fwd_accel, a2*(origin_X+ss_fwd_accel)+b2]
-        p_ss_2 = [p_ss_te[0]-ss_rwd_accel, a5*(p_ss_te[0]-ss_rwd_accel)+b5]
-        ss_constr = np.vstack([p_ss_le, p_ss_1, p_ss_2, p_ss_te]).T
-
-        # Generate Splines
-        le_spline = CreateBSpline(le_constr)
-        te_spline = CreateBSpline(te_constr)
-        ps_spline = CreateBSpline(ps_constr)
-        ss_spline = CreateBSpline(ss_constr)
-
-        # Combine all spline points
-        all_spline_coords = np.hstack((le_spline, ps_spline, te_spline, ss_spline)).T  # shape (M, 2)
-
-        # Compute error: sum of squared distances from each reference point to closest spline point
-        error = 0
-        for point in ref_points:
-            distances = np.linalg.norm(all_spline_coords - point, axis=1)
-            error += np.min(distances) ** 2
-        return error
-    
+        bounds = default_bounds(param_names)
+    scaled_bounds = [(None if low is None else low / k, None if high is None else high / k) for (low, high), k in zip(bounds, scale)]
+
+    def objective_function(x):
+        params_row = full.copy()
+        params_row[columns] = x * scale
+        with np.errstate(invalid='ignore', divide='ignore'):
+            residuals, jacobian = fit_residuals(params_row, ref_points)
+        value = float(residuals @ residuals)
+        if not np.isfinite(value):
+            # Degenerate construction (e.g. an angle at +-90 deg), send the line search back
+            return 1e10, np.zeros_like(x)
+        return value, 2 * (residuals @ jacobian[:, columns]) * scale
+
+    initial_error = objective_function(initial_params)[0]
+
+    iteration = [0]
+    def report(xk):
+        iteration[0] += 1
+        callback(iteration[0], objective_function(xk)[0], {k: float(xk[i] * scale[i]) for i, k in enumerate(param_names)})
+
     # # Run optimization
     result = minimize(
         objective_function,
         initial_params,
-        bounds=bounds,
+        jac=True,
+        bounds=scaled_bounds,
         method='L-BFGS-B',
-        options={'maxiter': 200, 'disp': True}
+        callback=report if callback else None,
+        options=dict({'maxiter': maxiter}, **({'ftol': ftol} if ftol else {}))
     )
+    result.x = result.x * scale
+    result.params = {k: float(result.x[i]) for i, k in enumerate(param_names)}
+
+    improved = result.fun < initial_error
+    if not result.success and result.status == 2 and improved:
+        # ABNORMAL_TERMINATION_IN_LNSRCH: no descent left along the (one-sided) gradient at a kink
+        logger.info(f"Line search stopped at error {result.fun:.4e}, keeping the best point.")
+        result.success = True
 
     # Assign optimized parameters back to airfoil
+    if accept_result(result, improved, LBFGSB_BUDGET_STATUS):
+        current_airfoil.params.update(result.params)
     if result.success:
-        for i, k in enumerate(param_names):
-            current_airfoil.params[k] = result.x[i]
         logger.info(f"Airfoil '{current_airfoil.infos.get('name', '')}' parameters fitted to reference.")
+    elif result.status == LBFGSB_BUDGET_STATUS:
+        # Expected for the short screening runs of a multi-start fit, not an error
+        logger.info(f"Stopped after {result.nit} iterations at error {result.fun:.4e}, "
+                    f"{'keeping the improved parameters' if result.accepted else 'no improvement'}.")
     else:
-        logger.error("Optimization failed:", result.message)
+        logger.error(f"Optimization failed: {result.message}")
 
     return result
 
+def fit_residuals(params_row, ref_points):
+    """
+    Residuals of the airfoil described by a full params row (airfoil_batch.PARAM_NAMES order) against ref_points.
+
+    Every reference point contributes the x and y offset to its orthogonal projection on the airfoil curves,
+    so the sum of squares is the exact squared distance, whatever the sampling resolution. Returns
+    (residuals (2N,), jacobian (2N, 19)); the jacobian moves the foot points with the control points at fixed
+    curve parameter, which gives the exact gradient of the sum of squares as the offsets are normal to the curves.
+    Where the closest curve of a reference point switches the sum of squares has a kink and the gradient is
+    the one of the curve currently closest.
+    """
+    import numpy as np
+    from src.obj.airfoil_batch import construct_control_points_with_jacobian
+
+    constr, d_constr = construct_control_points_with_jacobian(np.asarray(params_row, dtype=float)[None, :])
+    return _projected_residuals(constr, d_constr, 0, ref_points)
+
+def _projected_residuals(constr, d_constr, n, ref_points):
+    """ fit_residuals() of airfoil n of a batch built by construct_control_points_with_jacobian(). """
+    import numpy as np
+    from src.obj.airfoil_batch import KEYS
+    from src.obj.curve_projection import bernstein, project_points
+
+    ctrl = np.stack([constr[key][n] for key in KEYS])      # (4, 2, 4)
+    d_ctrl = np.stack([d_constr[key][n] for key in KEYS])  # (4, 2, 4, 19)
+
+    piece, t, foot = project_points(ctrl, ref_points)
+    residuals = (foot - ref_points).ravel()
+    basis = bernstein(t, ctrl.shape[-1] - 1)
+    jacobian = np.einsum('ni,ncij->ncj', basis, d_ctrl[piece]).reshape(len(residuals), -1)
+    return residuals, jacobian
+
+def fit_2_reference_lsq(current_airfoil, reference_airfoil, bounds=None, max_nfev=1000, callback=None, ftol=None):
+    """
+    Least-squares fit of the current airfoil to the reference with the analytic parameter Jacobian.
+
+    Uses the orthogonal residuals of fit_residuals() and a trust-region reflective solver. bounds follows
+    Fit2RefWindow.get_bounds(): (None, None) leaves a parameter free, (min, max) restrains it with either side
+    optional, and min == max fixes it, fixed parameters are left out of the optimization.
+    callback(evaluation, objective, params) is called for every new point, raising FitCancelled from it stops the fit.
+    """
+    import numpy as np
+    from scipy.optimize import least_squares
+    from src.obj.airfoil_batch import PARAM_NAMES, params_to_array
+
+    ref_points = reference_points(reference_airfoil)
+    if bounds is None:
+        bounds = default_bounds()
+
+    full = params_to_array([current_airfoil])[0]
+    columns = [PARAM_NAMES.index(k) for k in FIT_PARAMS]
+
+    free, lower, upper = [], [], []
+    for column, (min_bound, max_bound) in zip(columns, bounds):
+        if min_bound is not None and max_bound is not None and min_bound == max_bound:
+            full[column] = min_bound
+            continue
+        free.append(column)
+        lower.append(-np.inf if min_bound is None else min_bound)
+        upper.append(np.inf if max_bound is None else max_bound)
+    free = np.array(free, dtype=int)
+    lower, upper = np.array(lower, dtype=float), np.array(upper, dtype=float)
+
+    if len(free) == 0:
+        logger.warning("All parameters are fixed, nothing to fit.")
+        return None
+
+    # fun and jac are asked for the same x in turn, evaluate the geometry once for both
+    cache = {}
+    evaluations = []
+    def evaluate(x):
+        key = x.tobytes()
+        if key not in cache:
+            params_row = full.copy()
+            params_row[free] = x
+            cache.clear()
+            cache[key] = fit_residuals(params_row, ref_points)
+            if callback:
+                residuals = cache[key][0]
+                callback(len(evaluations) + 1, float(residuals @ residuals), {k: float(params_row[PARAM_NAMES.index(k)]) for k in FIT_PARAMS})
+            evaluations.append(key)
+        return cache[key]
+
+    x0 = np.clip(full[free], lower, upper)
+    initial_residuals = evaluate(x0)[0]
+    initial_cost = 0.5 * float(initial_residuals @ initial_residuals)
+    result = least_squares(
+        lambda x: evaluate(x)[0],
+        x0,
+        jac=lambda x: evaluate(x)[1][:, free],
+        bounds=(lower, upper),
+        method='trf',
+        x_scale='jac',
+        max_nfev=max_nfev,
+        ftol=ftol or FIT_FTOL,
+        xtol=FIT_XTOL
+    )
+
+    full[free] = result.x
+    result.params = {k: float(full[PARAM_NAMES.index(k)]) for k in FIT_PARAMS}
+
+    # Assign optimized parameters back to airfoil
+    if accept_result(result, result.cost < initial_cost, LSQ_BUDGET_STATUS):
+        current_airfoil.params.update(result.params)
+    if result.success:
+        logger.info(f"Airfoil '{current_airfoil.infos.get('name', '')}' parameters fitted to reference, residual: {2*result.cost:.3e}")
+    elif result.status == LSQ_BUDGET_STATUS:
+        # Expected for the short screening runs of a multi-start fit, not an error
+        logger.info(f"Stopped after {result.nfev} evaluations at residual {2*result.cost:.3e}, "
+                    f"{'keeping the improved parameters' if result.accepted else 'no improvement'}.")
+    else:
+        logger.error(f"Optimization failed: {result.message}")
+
+    return result
+
+def fit_2_reference_family(airfoils, references, shared=FAMILY_SHARED, bounds=None, max_nfev=1000, callback=None, ftol=None):
+    """
+    Fit several airfoils to their references at once, e.g. the root, mid and tip sections of a wing.
+
+    Parameters named in shared take one common value for the whole family, started from the mean over the
+    airfoils; the other FIT_PARAMS are fitted per section. bounds follows fit_2_reference_lsq() and applies to
+    every section. All sections are built in one batch and solved as one least-squares problem.
+    callback(evaluation, objective, params list) is called for every new point, raising FitCancelled stops the fit.
+    Returns the least_squares result with result.params, the fitted params dicts in airfoils order.
+    """
+    import numpy as np
+    from scipy.optimize import least_squares
+    from src.obj.airfoil_batch import PARAM_NAMES, construct_control_points_with_jacobian, params_to_array
+
+    if len(airfoils) != len(references):
+        raise ValueError("Every airfoil of the family needs its own reference")
+    unknown = [k for k in shared if k not in FIT_PARAMS]
+    if unknown:
+        raise ValueError(f"Cannot share unknown fit parameters: {', '.join(unknown)}")
+
+    ref_points = [reference_points(reference) for reference in references]
+    if bounds is None:
+        bounds = default_bounds()
+
+    full = params_to_array(airfoils)  # (n_sections, 19)
+    n_sections = len(full)
+
+    shared_columns, free_columns = [], []
+    shared_bounds, free_bounds = [], []
+    for k, (min_bound, max_bound) in zip(FIT_PARAMS, bounds):
+        column = PARAM_NAMES.index(k)
+        if min_bound is not None and max_bound is not None and min_bound == max_bound:
+            full[:, column] = min_bound
+            continue
+        bound = (-np.inf if min_bound is None else min_bound, np.inf if max_bound is None else max_bound)
+        if k in shared:
+            shared_columns.append(column)
+            shared_bounds.append(bound)
+        else:
+            free_columns.append(column)
+            free_bounds.append(bound)
+    n_shared = len(shared_columns)
+
+    if n_shared + len(free_columns) == 0:
+        logger.warning("All parameters are fixed, nothing to fit.")
+        return None
+
+    # x = [shared..., section 0 free..., section 1 free..., ...]
+    all_bounds = np.array(shared_bounds + free_bounds * n_sections, dtype=float).reshape(-1, 2)
+    lower, upper = all_bounds[:, 0], all_bounds[:, 1]
+    x0 = np.clip(np.concatenate([full[:, shared_columns].mean(axis=0), full[:, free_columns].ravel()]), lower, upper)
+
+    def unpack(x):
+        params_array = full.copy()
+        params_array[:, shared_columns] = x[:n_shared]
+        params_array[:, free_columns] = x[n_shared:].reshape(n_sections, -1)
+        return params_array
+
+    row_starts = np.cumsum([0] + [2 * len(points) for points in ref_points])
+    n_free = len(free_columns)
+
+    cache = {}
+    evaluations = [0]
+    def evaluate(x):
+        key = x.tobytes()
+        if key not in cache:
+            params_array = unpack(x)
+            constr, d_constr = construct_control_points_with_jacobian(params_array)
+            residuals = np.empty(row_starts[-1])
+            jacobian = np.zeros((row_starts[-1], len(x)))
+            for n, points in enumerate(ref_points):
+                rows = slice(row_starts[n], row_starts[n + 1])
+                residuals[rows], section_jacobian = _projected_residuals(constr, d_constr, n, points)
+                jacobian[rows, :n_shared] = section_jacobian[:, shared_columns]
+                jacobian[rows, n_shared + n * n_free:n_shared + (n + 1) * n_free] = section_jacobian[:, free_columns]
+            cache.clear()
+            cache[key] = residuals, jacobian
+            evaluations[0] += 1
+            if callback:
+                callback(evaluations[0], float(residuals @ residuals),
+                         [{k: float(row[PARAM_NAMES.index(k)]) for k in FIT_PARAMS} for row in params_array])
+        return cache[key]
+
+    initial_residuals = evaluate(x0)[0]
+    initial_cost = 0.5 * float(initial_residuals @ initial_residuals)
+    result = least_squares(
+        lambda x: evaluate(x)[0],
+        x0,
+        jac=lambda x: evaluate(x)[1],
+        bounds=(lower, upper),
+        method='trf',
+        x_scale='jac',
+        max_nfev=max_nfev,
+        ftol=ftol or FIT_FTOL,
+        xtol=FIT_XTOL
+    )
+
+    params_array = unpack(result.x)
+    result.params = [{k: float(row[PARAM_NAMES.index(k)]) for k in FIT_PARAMS} for row in params_array]
+
+    if accept_result(result, result.cost < initial_cost, LSQ_BUDGET_STATUS):
+        for airfoil, params in zip(airfoils, result.params):
+            airfoil.params.update(params)
+    if result.success:
+        logger.info(f"Family of {n_sections} airfoils fitted to reference, shared: {', '.join(shared) or 'none'}, residual: {2*result.cost:.3e}")
+    elif result.status == LSQ_BUDGET_STATUS:
+        logger.info(f"Family stopped after {result.nfev} evaluations at residual {2*result.cost:.3e}, "
+                    f"{'keeping the improved parameters' if result.accepted else 'no improvement'}.")
+    else:
+        logger.error(f"Optimization failed: {result.message}")
+
+    return result
+
+def fit_error(params, ref_points):
+    """ Orthogonal distance error of an airfoil params dictionary measured on the real Airfoil construction. """
+    from src.obj.airfoil_batch import params_to_array
+    from src.obj.curve_projection import orthogonal_error
+
+    return orthogonal_error(params_to_array([params])[0], ref_points)
+
+def perturbed_starts(params, bounds, n_starts, spread=0.1, seed=None):
+    """
+    n_starts params dictionaries: the given params first, then random perturbations of the fitted parameters.
+
+    Each parameter is perturbed by spread times its magnitude (at least 1 deg for angles, 0.01 for lengths),
+    fixed parameters are kept and the rest is clipped into its bounds.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    starts = [dict(params)]
+    for _ in range(n_starts - 1):
+        start = dict(params)
+        for k, (min_bound, max_bound) in zip(FIT_PARAMS, bounds):
+            if min_bound is not None and min_bound == max_bound:
+                continue
+            floor = 1.0 if "angle" in k else 0.01
+            value = params[k] + spread * max(abs(params[k]), floor) * rng.standard_normal()
+            if min_bound is not None:
+                value = max(value, min_bound)
+            if max_bound is not None:
+                value = min(value, max_bound)
+            start[k] = float(value)
+        starts.append(start)
+    return starts
+
+def subsample_reference(reference_airfoil, stride):
+    """ Copy of a selig format reference keeping every stride-th point of each curve, end points included. """
+    import numpy as np
+    import src.obj.objects2D as objects2D
+
+    def subsample(curve):
+        curve = np.asarray(curve)
+        indices = np.unique(np.append(np.arange(0, curve.shape[1], stride), curve.shape[1] - 1))
+        return curve[:, indices]
+
+    reference = objects2D.Airfoil_selig_format()
+    reference.infos = dict(reference_airfoil.infos)
+    reference.top_curve = subsample(reference_airfoil.top_curve)
+    reference.dwn_curve = subsample(reference_airfoil.dwn_curve)
+    return reference
+
+def fit_2_reference_schedule(current_airfoil, reference_airfoil, bounds=None, mode="Least squares", schedule=None, callback=None):
+    """
+    Coarse-to-fine fit: every stage of the schedule (FIT_SCHEDULE by default) fits a subsampled reference
+    until the objective plateaus below the stage tolerance, and hands its params to the next one.
+    The last stage is a plain fit to the whole reference, its result is returned.
+    """
+    schedule = FIT_SCHEDULE if schedule is None else schedule
+    start_params = dict(current_airfoil.params)
+    iterations = [0]
+    result = None
+
+    for stage, (stride, ftol) in enumerate(schedule, 1):
+        reference = reference_airfoil if stride == 1 else subsample_reference(reference_airfoil, stride)
+
+        offset = iterations[0]
+        def stage_callback(iteration, objective, params):
+            iterations[0] = offset + iteration
+            if callback:
+                callback(iterations[0], objective, params)
+
+        if mode == "Least squares":
+            result = fit_2_reference_lsq(current_airfoil, reference, bounds=bounds, callback=stage_callback, ftol=ftol)
+        else:
+            result = fit_2_reference(current_airfoil, reference, bounds=bounds, callback=stage_callback, ftol=ftol)
+        if result is None:
+            return None
+
+        # Intermediate stages may stop on their budget, carry their params on anyway
+        current_airfoil.params.update(result.params)
+        logger.info(f"Fit stage {stage}/{len(schedule)}: stride {stride}, {result.nfev} evaluations")
+
+    if not result.accepted:
+        current_airfoil.params.update(start_params)
+    return result
+
+def fit_settings(mode="Least squares", n_starts=1, coarse_to_fine=False):
+    """ Fit settings that change the result, as stored with a cached fit. """
+    return {'mode': mode, 'n_starts': n_starts, 'schedule': FIT_SCHEDULE if coarse_to_fine and n_starts == 1 else None,
+            'metric': 'orthogonal'}
+
+def _fit_start(params, top_curve, dwn_curve, bounds, mode, budget):
+    """ One multi-start run, executed in a worker process. Returns (fitted params, error, evaluations, success). """
+    import src.obj.objects2D as objects2D
+
+    airfoil = objects2D.Airfoil()
+    airfoil.params.update(params)
+    reference = objects2D.Airfoil_selig_format()
+    reference.top_curve = top_curve
+    reference.dwn_curve = dwn_curve
+
+    if mode == "Least squares":
+        result = fit_2_reference_lsq(airfoil, reference, bounds=bounds, max_nfev=budget)
+    else:
+        result = fit_2_reference(airfoil, reference, bounds=bounds, maxiter=budget)
+
+    if result is None:
+        return dict(params), fit_error(params, reference_points(reference)), 0, True
+
+    fitted = dict(params)
+    fitted.update(result.params)
+    return fitted, fit_error(fitted, reference_points(reference)), int(result.nfev), bool(result.accepted)
+
+def fit_2_reference_multistart(current_airfoil, reference_airfoil, bounds=None, n_starts=8, workers=None,
+                               mode="Least squares", spread=0.1, seed=None, budget=1000, screen_budget=20, keep=0.5,
+                               callback=None, cancelled=None):
+    """
+    Fit from n_starts perturbed initial guesses on a process pool and keep the best one.
+
+    Every start first runs a short screening fit of screen_budget evaluations/iterations; only the best 'keep'
+    fraction continues with the full budget, the other starts are dropped. The best parameters are written to
+    current_airfoil. Returns (best, summary) where summary lists one dict per start (start, error, evaluations,
+    success, stage, params) ranked by the orthogonal distance error of fit_error() on the real construction.
+    callback(finished_runs, best_error, best_params) is called as runs finish, raising FitCancelled from it drops
+    the pending runs and stops the fit. cancelled() is polled every CANCEL_POLL seconds and between the screening
+    and the full round, returning True does the same without waiting for a run to finish.
+    """
+    import math
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    if bounds is None:
+        bounds = default_bounds()
+
+    ref_points = reference_points(reference_airfoil)
+    top_curve, dwn_curve = reference_airfoil.top_curve, reference_airfoil.dwn_curve
+    starts = perturbed_starts(current_airfoil.params, bounds, n_starts, spread, seed)
+
+    summary = [{'start': i, 'error': fit_error(params, ref_points), 'evaluations': 0, 'success': False,
+                'stage': 'initial', 'params': params} for i, params in enumerate(starts)]
+
+    finished = [0]
+    def run(executor, entries, stage_budget, stage):
+        futures = {executor.submit(_fit_start, entry['params'], top_curve, dwn_curve, bounds, mode, stage_budget): entry for entry in entries}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=CANCEL_POLL, return_when=FIRST_COMPLETED)
+            for future in done:
+                params, error, evaluations, success = future.result()
+                entry = futures[future]
+                entry.update(params=params, error=error, evaluations=entry['evaluations'] + evaluations, success=success, stage=stage)
+                finished[0] += 1
+                if callback:
+                    leader = min(summary, key=lambda entry: entry['error'])
+                    callback(finished[0], leader['error'], leader['params'])
+            check_cancelled()
+
+    def check_cancelled():
+        if cancelled is not None and cancelled():
+            raise FitCancelled()
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        if n_starts > 1 and screen_budget < budget:
+            run(executor, summary, screen_budget, 'screened')
+            check_cancelled()
+            summary.sort(key=lambda entry: entry['error'])
+            survivors = summary[:max(1, math.ceil(keep * n_starts))]
+        else:
+            survivors = summary
+        run(executor, survivors, budget, 'full')
+    except FitCancelled:
+        # Running fits cannot be interrupted, stop their processes instead of letting them finish unseen
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        raise
+    executor.shutdown()
+
+    summary.sort(key=lambda entry: (entry['stage'] != 'full', entry['error']))
+    best = summary[0]
+    current_airfoil.params.update({k: best['params'][k] for k in FIT_PARAMS})
+
+    logger.info(f"Multi-start fit of '{current_airfoil.infos.get('name', '')}', {n_starts} starts:")
+    for rank, entry in enumerate(summary, 1):
+        logger.info(f"  {rank:>2}. start {entry['start']:>2}  error {entry['error']:.4e}  evaluations {entry['evaluations']:>4}  {entry['stage']}")
+
+    return best, summary
+
+class FitThread(QThread):
+    """
+    Runs one of the fits on a copy of the airfoil outside the GUI thread.
+
+    progress(iteration, objective, params) is emitted while the optimizer runs, then exactly one of
+    fitted(params or None), cancelled() or failed(message).
+
+    With use_cache the result is looked up in the fit cache first and stored there after a successful fit.
+    Otherwise the fit starts from the best of the current params, a cached fit of the same reference with other
+    bounds or settings and the fits of the nearest shapes in the fit index; the result is added to the index.
+    """
+    progress = pyqtSignal(int, float, object)
+    fitted = pyqtSignal(object)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, current_airfoil, reference_airfoil, bounds, mode="Least squares", n_starts=1, workers=None, coarse_to_fine=False, use_cache=True, parent=None):
+        import src.obj.objects2D as objects2D
+
+        super().__init__(parent)
+        # The optimizer works on its own airfoil, the GUI thread keeps drawing the displayed one
+        self.airfoil = objects2D.Airfoil()
+        self.airfoil.infos.update(current_airfoil.infos)
+        self.airfoil.params.update(current_airfoil.params)
+        self.reference_airfoil = reference_airfoil
+        self.bounds = bounds
+        self.mode = mode
+        self.n_starts = n_starts
+        self.workers = workers
+        self.coarse_to_fine = coarse_to_fine
+        self.use_cache = use_cache
+        self._cancel = False
+        self._last_progress = 0.0
+
+    def cancel(self):
+        self._cancel = True
+
+    def _callback(self, iteration, objective, params):
+        if self._cancel:
+            raise FitCancelled()
+        now = time.monotonic()
+        if now - self._last_progress >= PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.progress.emit(iteration, objective, dict(params))
+
+    def run(self):
+        from src.arfdes.fit_cache import FitCache
+        from src.arfdes.fit_index import FitIndex, best_start, lookup_fit
+
+        cache = None
+        try:
+            if self.use_cache:
+                cache = FitCache()
+                index = FitIndex()
+                key, ref_digest, cached, candidates = lookup_fit(cache, index, self.reference_airfoil, self.bounds,
+                                                                 fit_settings(self.mode, self.n_starts, self.coarse_to_fine), self.airfoil.params)
+                if cached is not None:
+                    logger.info("Fit found in the fit cache.")
+                    cache.save()
+                    self.fitted.emit(cached)
+                    return
+                if candidates:
+                    self.airfoil.params.update(best_start(self.airfoil.params, reference_points(self.reference_airfoil), candidates))
+
+            if self.n_starts > 1:
+                best, summary = fit_2_reference_multistart(self.airfoil, self.reference_airfoil, bounds=self.bounds, n_starts=self.n_starts,
+                                                           workers=self.workers, mode=self.mode, callback=self._callback,
+                                                           cancelled=lambda: self._cancel)
+                # best has the lowest error of the full runs: it counts if its own run converged or if it beats one that did
+                success = best['stage'] == 'full' and any(entry['success'] for entry in summary if entry['stage'] == 'full')
+            elif self.coarse_to_fine:
+                result = fit_2_reference_schedule(self.airfoil, self.reference_airfoil, bounds=self.bounds, mode=self.mode, callback=self._callback)
+                success = result is not None and result.accepted
+            elif self.mode == "Least squares":
+                result = fit_2_reference_lsq(self.airfoil, self.reference_airfoil, bounds=self.bounds, callback=self._callback)
+                success = result is not None and result.accepted
+            else:
+                result = fit_2_reference(self.airfoil, self.reference_airfoil, bounds=self.bounds, callback=self._callback)
+                success = result.accepted
+        except FitCancelled:
+            logger.info("Fit cancelled.")
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            logger.exception("Fit failed")
+            self.failed.emit(str(e))
+            return
+
+        params = {k: self.airfoil.params[k] for k in FIT_PARAMS}
+        if success and cache is not None:
+            try:
+                cache.put(key, ref_digest, params, fit_error(self.airfoil.params, reference_points(self.reference_airfoil)),
+                          self.airfoil.infos.get('name', ''))
+                cache.save()
+                index.add(self.reference_airfoil, params, self.reference_airfoil.infos.get('name', ''))
+                index.save()
+            except OSError as e:
+                logger.warning(f"Could not write the fit cache: {e}")
+        self.fitted.emit(params if success else None)
+
 class Fit2RefWindow(QDialog):
-    def __init__(self, parent=None, current_airfoil=None, reference_airfoil=None):
+    def __init__(self, parent=None, current_airfoil=None, reference_airfoil=None, viewport=None):
         import src.globals as globals
 
         super().__init__(parent)
@@ -166,6 +713,9 @@ class Fit2RefWindow(QDialog):
         self.resize(400, 500)
         self.current_airfoil = current_airfoil
         self.reference_airfoil = reference_airfoil
+        self.viewport = viewport
+        self.fit_thread = None
+        self.initial_params = None
 
         main_layout = QVBoxLayout()
         self.setLayout(main_layout)
@@ -216,38 +766,60 @@ class Fit2RefWindow(QDialog):
             self.input_maxs[box_attr] = input_max
 
         main_layout.addLayout(form_layout)
+
+        mode_layout = QFormLayout()
+        self.mode_box = QComboBox()
+        self.mode_box.addItems(FIT_MODES)
+        mode_layout.addRow(QLabel("Method:"), self.mode_box)
+        self.starts_box = QSpinBox()
+        self.starts_box.setRange(1, 256)
+        self.starts_box.setValue(1)
+        mode_layout.addRow(QLabel("Starts:"), self.starts_box)
+        self.workers_box = QSpinBox()
+        self.workers_box.setRange(1, 256)
+        self.workers_box.setValue(os.cpu_count() or 1)
+        mode_layout.addRow(QLabel("Workers:"), self.workers_box)
+        self.coarse_to_fine_box = QCheckBox()
+        self.coarse_to_fine_box.setChecked(False)
+        mode_layout.addRow(QLabel("Coarse to fine:"), self.coarse_to_fine_box)
+        self.use_cache_box = QCheckBox()
+        self.use_cache_box.setChecked(True)
+        mode_layout.addRow(QLabel("Use fit cache:"), self.use_cache_box)
+        main_layout.addLayout(mode_layout)
         main_layout.addStretch()
 
+        self.status_label = QLabel("")
+        main_layout.addWidget(self.status_label)
+
         btn_box = QHBoxLayout()
         self.proceed_btn = QPushButton("Proceed")
+        self.stop_btn = QPushButton("Cancel")
+        self.stop_btn.setEnabled(False)
         self.cancel_btn = QPushButton("Close")
         btn_box.addWidget(self.proceed_btn)
+        btn_box.addWidget(self.stop_btn)
         btn_box.addWidget(self.cancel_btn)
         main_layout.addLayout(btn_box)
 
         self.proceed_btn.clicked.connect(self.run_fit)
+        self.stop_btn.clicked.connect(self.stop_fit)
         self.cancel_btn.clicked.connect(self.reject)
 
     def get_bounds(self, params):
         bounds = []
-        param_keys = [
-            "chord", "le_thickness", "le_depth", "le_offset", "le_angle",
-            "te_thickness", "te_depth", "te_offset", "te_angle",
-            "ps_fwd_angle", "ps_rwd_angle", "ps_fwd_accel", "ps_rwd_accel",
-            "ss_fwd_angle", "ss_rwd_angle", "ss_fwd_accel", "ss_rwd_accel"
-        ]
+        param_keys = FIT_PARAMS
         for i, key in enumerate(param_keys):
             combo = self.combo_boxes[self.param_defs[i][1]]
             min_edit = self.input_mins[self.param_defs[i][1]]
             max_edit = self.input_maxs[self.param_defs[i][1]]
-            if combo.currentText() == "Restrain":
+            if combo.currentText() == "Restrained":
                 min_val = min_edit.text().strip()
                 max_val = max_edit.text().strip()
                 min_bound = float(min_val) if min_val else None
                 max_bound = float(max_val) if max_val else None
                 bounds.append((min_bound, max_bound))
                 # For chord, if max is empty, use params["chord"] as default
-            if combo.currentText() == "Fixed":
+            elif combo.currentText() == "Fixed":
                 #if key == "chord" and max_val == "":
                 min_bound = params.get(param_keys[i], None)
                 max_bound = params.get(param_keys[i], None)
@@ -257,12 +829,74 @@ class Fit2RefWindow(QDialog):
         return bounds
 
     def run_fit(self):
+        if self.fit_thread is not None and self.fit_thread.isRunning():
+            return
+        if self.reference_airfoil is None:
+            self.status_label.setText("No reference loaded")
+            logger.warning("No reference airfoil to fit to.")
+            return
+
         params = self.current_airfoil.params
         bounds = self.get_bounds(params)
         logger.debug(bounds)
-        result = fit_2_reference(self.current_airfoil, self.reference_airfoil, bounds=bounds)
-        if result.success:
-            self.accept()
+        self.initial_params = dict(params)
+
+        self.fit_thread = FitThread(self.current_airfoil, self.reference_airfoil, bounds, mode=self.mode_box.currentText(),
+                                    n_starts=self.starts_box.value(), workers=self.workers_box.value(),
+                                    coarse_to_fine=self.coarse_to_fine_box.isChecked(), use_cache=self.use_cache_box.isChecked(),
+                                    parent=self)
+        self.fit_thread.progress.connect(self.on_progress)
+        self.fit_thread.fitted.connect(self.on_fitted)
+        self.fit_thread.cancelled.connect(self.on_cancelled)
+        self.fit_thread.failed.connect(self.on_failed)
+        self.fit_thread.finished.connect(lambda: self.set_running(False))
+
+        self.set_running(True)
+        self.status_label.setText("Fitting...")
+        self.fit_thread.start()
+
+    def stop_fit(self):
+        if self.fit_thread is not None and self.fit_thread.isRunning():
+            self.status_label.setText("Cancelling...")
+            self.fit_thread.cancel()
+
+    def set_running(self, running):
+        self.proceed_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+
+    def show_params(self, params):
+        """ Push params to the displayed airfoil so the viewport follows the optimizer. """
+        self.current_airfoil.params.update(params)
+        if self.viewport is not None:
+            self.viewport.update()
+
+    def on_progress(self, iteration, objective, params):
+        self.status_label.setText(f"Iteration {iteration}, error {objective:.4e}")
+        self.show_params(params)
+
+    def on_fitted(self, params):
+        if params is None:
+            self.status_label.setText("Fit did not converge, parameters restored")
+            self.show_params(self.initial_params)
+            return
+        self.show_params(params)
+        self.fit_thread.wait()
+        self.accept()
+
+    def on_cancelled(self):
+        self.status_label.setText("Cancelled, parameters restored")
+        self.show_params(self.initial_params)
+
+    def on_failed(self, message):
+        self.status_label.setText(f"Fit failed: {message}")
+        self.show_params(self.initial_params)
+
+    def reject(self):
+        if self.fit_thread is not None and self.fit_thread.isRunning():
+            self.fit_thread.cancel()
+            self.fit_thread.wait()
+            self.show_params(self.initial_params)
+        super().reject()
 
 
 # For testing the dialog independently
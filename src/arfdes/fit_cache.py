@@ -0,0 +1,140 @@
+'''
+
+Copyright (C) 2025 Jakub Kamyk
+
+This file is part of DAEDALUS.
+
+DAEDALUS is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+DAEDALUS is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = os.path.join(os.path.expanduser("~"), ".daedalus", "fit_cache.json")
+
+# Entries kept on disk, the least recently used ones are evicted first
+MAX_ENTRIES = 2000
+
+# Decimals of the reference coordinates taken into the hash, below any Selig file precision
+HASH_DECIMALS = 9
+
+CACHE_VERSION = 2
+
+# One lock for every FitCache of the process, fits in threads share the same file
+_lock = threading.Lock()
+
+def reference_digest(ref_points):
+    """ Hash of the (N, 2) reference coordinates. """
+    points = np.round(np.asarray(ref_points, dtype=float), HASH_DECIMALS) + 0.0  # + 0.0 turns -0.0 into 0.0
+    return hashlib.sha1(np.ascontiguousarray(points).tobytes()).hexdigest()
+
+def fit_key(ref_points, bounds, settings, start_params=None):
+    """
+    Cache key of a fit: (key, reference digest).
+
+    bounds is the per FIT_PARAMS list of (min, max) with None for open sides, settings a JSON-able dict of
+    everything else that changes the result (method, schedule, number of starts...). The parameters of
+    start_params the fit does not touch (origin_X, origin_Y) place the fitted section, they are part of the key.
+    """
+    from src.arfdes.fit_2_reference import FIT_PARAMS
+
+    ref_digest = reference_digest(ref_points)
+    fixed = {k: float(v) for k, v in (start_params or {}).items() if k not in FIT_PARAMS}
+    config = json.dumps({'bounds': [list(bound) for bound in bounds] if bounds is not None else None,
+                         'settings': settings, 'fixed': fixed}, sort_keys=True)
+    key = hashlib.sha1((ref_digest + config).encode()).hexdigest()
+    return key, ref_digest
+
+class FitCache:
+    """
+    Persistent store of fitted parameters.
+
+    An entry is found again by the exact reference, bounds and settings it was fitted with. Entries fitted to
+    the same reference with other bounds or settings are near matches, their params make a good warm start.
+    The file is a JSON object kept in least recently used order and capped at max_entries.
+    """
+    def __init__(self, path=CACHE_FILE, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.load()
+
+    def load(self):
+        self.entries.clear()
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self.entries.update(data.get('entries', []))
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+            logger.warning(f"Fit cache {self.path} is unreadable, starting an empty one.")
+
+    def save(self):
+        """ Write through a temporary file, a crash never leaves a half written cache behind. """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with _lock:
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': CACHE_VERSION, 'entries': list(self.entries.items())}, f)
+            os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        """ Params stored under key or None, a hit makes the entry the most recently used one. """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        entry['used'] = time.time()
+        self.entries.move_to_end(key)
+        return dict(entry['params'])
+
+    def near_match(self, ref_digest):
+        """ Params of the best entry fitted to the same reference with any bounds or settings, None if there is none. """
+        matches = [entry for entry in self.entries.values() if entry['reference'] == ref_digest]
+        if not matches:
+            return None
+        return dict(min(matches, key=lambda entry: entry['error'])['params'])
+
+    def put(self, key, ref_digest, params, error, name=""):
+        """ Store the fitted parameters of params only, a hit is merged onto the airfoil being fitted. """
+        from src.arfdes.fit_2_reference import FIT_PARAMS
+
+        self.entries[key] = {'reference': ref_digest, 'params': {k: float(v) for k, v in params.items() if k in FIT_PARAMS},
+                             'error': float(error), 'name': name, 'used': time.time()}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            evicted, _ = self.entries.popitem(last=False)
+            logger.debug(f"Fit cache entry {evicted} evicted")
+
+    def clear(self):
+        self.entries.clear()
+        self.save()
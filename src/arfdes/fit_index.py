@@ -0,0 +1,172 @@
+'''
+
+Copyright (C) 2025 Jakub Kamyk
+
+This file is part of DAEDALUS.
+
+DAEDALUS is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+DAEDALUS is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import logging
+import os
+import threading
+
+import numpy as np
+
+from src.arfdes.fit_2_reference import FIT_PARAMS, default_bounds, fit_error, reference_points
+from src.obj.section_properties import DESCRIPTOR_STATIONS, shape_descriptors
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = os.path.join(os.path.expanduser("~"), ".daedalus", "fit_index.npz")
+
+# Neighbours tried as starting point of a fit
+WARM_START_NEIGHBOURS = 4
+
+# Parameters stored per unit chord, the angles are independent of the airfoil size
+LENGTH_PARAMS = [k for k in FIT_PARAMS if "angle" not in k]
+
+_lock = threading.Lock()
+
+def reference_outline(reference_airfoil):
+    """ Closed (P, 2) outline of a selig format reference: upper surface TE -> LE, lower surface LE -> TE. """
+    top = np.asarray(reference_airfoil.top_curve, dtype=float)
+    dwn = np.asarray(reference_airfoil.dwn_curve, dtype=float)
+    return np.hstack((top[:, ::-1], dwn)).T
+
+def shape_descriptor(outline):
+    """ shape_descriptors() of one (P, 2) outline: (descriptor (2*DESCRIPTOR_STATIONS,), chord length). """
+    descriptors, chords = shape_descriptors(np.asarray(outline, dtype=float)[None])
+    return descriptors[0], float(chords[0])
+
+def _scale(params, factor):
+    """ Copy of fitted params with the length parameters multiplied by factor. """
+    scaled = dict(params)
+    for k in LENGTH_PARAMS:
+        scaled[k] = params[k] * factor
+    return scaled
+
+class FitIndex:
+    """
+    Nearest neighbour index of fitted airfoils: the shape descriptor of every fitted reference next to the
+    fitted params (per unit chord). The neighbours of a new reference give the fit a starting point close to
+    its final shape.
+
+    Stored as one .npz file, the KD-tree is rebuilt lazily after changes.
+    """
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.descriptors = np.empty((0, 2 * DESCRIPTOR_STATIONS))
+        self.params = np.empty((0, len(FIT_PARAMS)))
+        self.names = []
+        self._tree = None
+        self.load()
+
+    def load(self):
+        try:
+            with np.load(self.path) as data:
+                if data['descriptors'].shape[1] == 2 * DESCRIPTOR_STATIONS and list(data['param_names']) == FIT_PARAMS:
+                    self.descriptors = data['descriptors']
+                    self.params = data['params']
+                    self.names = [str(name) for name in data['names']]
+        except FileNotFoundError:
+            pass
+        except (OSError, KeyError, ValueError):
+            logger.warning(f"Fit index {self.path} is unreadable, starting an empty one.")
+        self._tree = None
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp.npz'
+        with _lock:
+            np.savez(tmp_path, descriptors=self.descriptors, params=self.params, names=np.array(self.names, dtype=str),
+                     param_names=np.array(FIT_PARAMS))
+            os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self.descriptors)
+
+    def add(self, reference_airfoil, params, name=""):
+        """ Add the fitted params of a reference, replacing the entry of an identical shape. """
+        descriptor, chord = shape_descriptor(reference_outline(reference_airfoil))
+        row = np.array([_scale(params, 1 / chord)[k] for k in FIT_PARAMS])
+        if len(self):
+            distances, indices = self._query(descriptor, 1)
+            if distances[0] < 1e-12:
+                self.params[indices[0]] = row
+                self.names[indices[0]] = name
+                return
+        self.descriptors = np.vstack([self.descriptors, descriptor])
+        self.params = np.vstack([self.params, row])
+        self.names.append(name)
+        self._tree = None
+
+    def _query(self, descriptor, k):
+        from scipy.spatial import cKDTree
+
+        if self._tree is None:
+            self._tree = cKDTree(self.descriptors)
+        distances, indices = self._tree.query(descriptor, k=min(k, len(self)))
+        return np.atleast_1d(distances), np.atleast_1d(indices)
+
+    def nearest(self, reference_airfoil, k=WARM_START_NEIGHBOURS):
+        """ Up to k (distance, name, params) of the closest fitted shapes, params scaled to the reference chord. """
+        if not len(self):
+            return []
+        descriptor, chord = shape_descriptor(reference_outline(reference_airfoil))
+        distances, indices = self._query(descriptor, k)
+        return [(float(distance), self.names[i], _scale(dict(zip(FIT_PARAMS, self.params[i])), chord))
+                for distance, i in zip(distances, indices)]
+
+    def warm_start(self, current_params, reference_airfoil, k=WARM_START_NEIGHBOURS):
+        """
+        Best starting point for fitting reference_airfoil: the current params or the params of one of the k
+        nearest fitted shapes, whichever has the lowest nearest point error. Returns a full params dictionary.
+        """
+        candidates = [params for _, _, params in self.nearest(reference_airfoil, k)]
+        return best_start(current_params, reference_points(reference_airfoil), candidates)
+
+def lookup_fit(cache, index, reference_airfoil, bounds, settings, start_params):
+    """
+    Look a fit up before running it: (key, reference digest, cached params, start candidates).
+
+    cached params is the FitCache entry of the same reference, bounds (None for the defaults), settings and
+    start_params, None on a miss. On a miss the start candidates are a cached fit of the same reference with
+    other bounds or settings followed by the fits of the nearest shapes in the FitIndex, see best_start().
+    """
+    from src.arfdes.fit_cache import fit_key
+
+    bounds = bounds if bounds is not None else default_bounds()
+    key, ref_digest = fit_key(reference_points(reference_airfoil), bounds, settings, start_params)
+    cached = cache.get(key)
+    if cached is not None:
+        return key, ref_digest, cached, None
+    candidates = [params for _, _, params in index.nearest(reference_airfoil)]
+    near_match = cache.near_match(ref_digest)
+    if near_match is not None:
+        candidates.insert(0, near_match)
+    return key, ref_digest, None, candidates
+
+def best_start(current_params, ref_points, candidates):
+    """ The current params updated with the candidate (fitted params dict) of the lowest nearest point error, if any beats them. """
+    best = dict(current_params)
+    best_error = fit_error(best, ref_points)
+    for params in candidates:
+        candidate = dict(current_params, **params)
+        error = fit_error(candidate, ref_points)
+        if error < best_error:
+            best, best_error = candidate, error
+    return best
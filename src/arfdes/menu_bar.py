@@ -19,6 +19,7 @@ along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
 
 '''
 import logging
+import os
 from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtWidgets import (
     QLabel, QInputDialog, QDialog, QDialogButtonBox, QMenuBar, QAction, QFileDialog, QTreeWidget, QTreeWidgetItem, 
@@ -27,6 +28,7 @@ from PyQt5.QtWidgets import (
 )
 
 import src.utils.dxf as dxf
+import src.utils.selig as selig
 import src.arfdes.tools_airfoil as tools_airfoil
 from src.arfdes.tools_airfoil import Reference_load
 from src.obj.objects2D import Airfoil
@@ -76,45 +78,57 @@ class MenuBar(QMenuBar):
 
         newAirfoilAction = QAction('Create', self)
         appendAirfoilAction = QAction('Append', self)
+        importFilesAction = QAction('Import Files', self)
+        importFolderAction = QAction('Import Folder', self)
         deleteAirfoilAction = QAction('Delete', self)
         saveAirfoilAction = QAction('Save', self)
         exportAirfoilAction = QAction('Export', self)
+        exportAllAirfoilsAction = QAction('Export All to DAT', self)
         flipAirfoilAction = QAction('Flip Airfoil', self)
         renameAirfoilAction = QAction('Rename', self)
         editDescriptionAction = QAction('Edit Description', self)
         fit2refAction = QAction('Fit2Reference', self)
+        similarAction = QAction('Find Similar References', self)
 
         newAirfoilAction.triggered.connect(self.newAirfoil)
         appendAirfoilAction.triggered.connect(self.appendAirfoil)
+        importFilesAction.triggered.connect(self.importFiles)
+        importFolderAction.triggered.connect(self.importFolder)
         deleteAirfoilAction.triggered.connect(self.deleteAirfoil)  
         saveAirfoilAction.triggered.connect(self.saveAirfoil)
         exportAirfoilAction.triggered.connect(self.exportAirfoil)
+        exportAllAirfoilsAction.triggered.connect(self.exportAllAirfoils)
         flipAirfoilAction.triggered.connect(self.flipAirfoil)
         renameAirfoilAction.triggered.connect(self.renameAirfoil)
         editDescriptionAction.triggered.connect(self.editDescriptionAirfoil)
         fit2refAction.triggered.connect(self.fit2ref)
+        similarAction.triggered.connect(self.findSimilar)
         
         editMenu.addAction(newAirfoilAction)
         editMenu.addAction(appendAirfoilAction)
+        editMenu.addAction(importFilesAction)
+        editMenu.addAction(importFolderAction)
         editMenu.addAction(deleteAirfoilAction)
         editMenu.addAction(saveAirfoilAction)
         editMenu.addAction(exportAirfoilAction)
+        editMenu.addAction(exportAllAirfoilsAction)
         editMenu.addAction(flipAirfoilAction)
         editMenu.addSeparator()
         editMenu.addAction(renameAirfoilAction)
         editMenu.addAction(editDescriptionAction)
+        editMenu.addAction(similarAction)
         if globals.DAEDALUS.preferences['general']['beta_features']:
             editMenu.addAction(fit2refAction)
 
         """View menu creation"""
         viewMenu = self.addMenu('View')
 
-        referenceAction = QAction('Show reference', self)
-        referenceAction.setCheckable(True)
-        referenceAction.setChecked(False)
-        referenceAction.triggered.connect(self.toggleReference)
+        self.referenceAction = QAction('Show reference', self)
+        self.referenceAction.setCheckable(True)
+        self.referenceAction.setChecked(False)
+        self.referenceAction.triggered.connect(self.toggleReference)
 
-        viewMenu.addAction(referenceAction)
+        viewMenu.addAction(self.referenceAction)
 
         """Module menu creation"""
         moduleMenu = self.addMenu('Module')
@@ -185,13 +199,79 @@ class MenuBar(QMenuBar):
         if fileName:
             try:
                 airfoil_obj, _ = tools_airfoil.load_airfoil_from_json(fileName)
-                globals.PROJECT.project_airfoils.append(airfoil_obj)
-                if airfoil_obj:
-                    self.logger.debug(airfoil_obj)
-                    add_airfoil_to_tree(self.tree_menu, airfoil_obj.infos['name'], airfoil_obj)
-                    self.logger.info("Appending an airfoil was sucessful!")
-            except TypeError:
-                self.logger.error("Failed to append airfoil")
+            except tools_airfoil.AirfoilFileError as e:
+                self.logger.error(f"Failed to append airfoil: {e}")
+                return
+            globals.PROJECT.project_airfoils.append(airfoil_obj)
+            self.logger.debug(airfoil_obj)
+            add_airfoil_to_tree(self.tree_menu, airfoil_obj.infos['name'], airfoil_obj)
+            self.logger.info("Appending an airfoil was sucessful!")
+
+    def importFiles(self):
+        """Import several .arf and coordinate files at once, coordinate files are read as references unless fitting is asked for."""
+        options = QFileDialog.Options()
+        fileNames, _ = QFileDialog.getOpenFileNames(self, "Import Files", "", "Airfoils (*.arf *.txt *.dat);;Daedalus Airfoil Format (*.arf);;All Files (*)", options=options)
+        if fileNames:
+            self.importAirfoils(fileNames)
+
+    def importFolder(self):
+        """Import every .arf and coordinate file of a folder."""
+        from src.arfdes.bulk_import import import_files_in
+
+        directory = QFileDialog.getExistingDirectory(self, "Import Folder", "")
+        if directory:
+            fileNames = import_files_in(directory)
+            if not fileNames:
+                self.logger.warning(f"No airfoil files found in {directory}")
+                return
+            self.importAirfoils(fileNames)
+
+    def importAirfoils(self, fileNames):
+        """
+        Load the files outside the GUI thread, then add all airfoils to the project and the tree in one go.
+
+        Coordinate files are shown as references, or fitted with the parametric airfoil when the user opts in.
+        """
+        from PyQt5.QtCore import Qt
+        from PyQt5.QtWidgets import QProgressDialog
+        from src.arfdes.bulk_import import ImportThread, is_airfoil_file
+        from src.arfdes.widget_tree import add_airfoils_to_tree
+
+        coordinate_count = sum(1 for fileName in fileNames if not is_airfoil_file(fileName))
+        fit = coordinate_count > 0 and QMessageBox.question(
+            self, "Import", f"Fit the {coordinate_count} coordinate files with the parametric airfoil?\n\n"
+            "Fitting runs in worker processes and takes a few seconds per file. Otherwise the files are read as references.",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No) == QMessageBox.Yes
+
+        self.logger.info(f"Importing {len(fileNames)} files...")
+        progress = QProgressDialog("Importing airfoils...", "Cancel", 0, len(fileNames), self.main_window)
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        self.import_thread = ImportThread(fileNames, fit=fit, parent=self)
+
+        def on_progress(done, total, fileName):
+            progress.setValue(done)
+            progress.setLabelText(f"Imported {fileName} ({done}/{total})")
+
+        def on_imported(airfoils, references, failures):
+            progress.close()
+            globals.PROJECT.project_airfoils.extend(airfoils)
+            add_airfoils_to_tree(self.tree_menu, airfoils)
+            self.logger.info(f"Imported {len(airfoils)} airfoils and {len(references)} references")
+            if references:
+                # The view displays one reference at a time, the first file read is shown
+                self.showReference(references[0][0])
+                if len(references) > 1:
+                    self.logger.info(f"Showing {os.path.basename(references[0][0])} of {len(references)} references read")
+            if failures:
+                QMessageBox.warning(self, "Import", f"{len(failures)} of {len(fileNames)} files could not be imported:\n" +
+                                    "\n".join(f"{os.path.basename(fileName)}: {message}" for fileName, message in failures[:20]))
+
+        self.import_thread.progress.connect(on_progress)
+        self.import_thread.imported.connect(on_imported)
+        self.import_thread.cancelled.connect(progress.close)
+        progress.canceled.connect(self.import_thread.cancel)
+        self.import_thread.start()
 
     def deleteAirfoil(self):
         self.logger.info("Deleting selected airfoil...")
@@ -252,6 +332,22 @@ class MenuBar(QMenuBar):
             dxf.export_airfoil_to_dxf(airfoil_index, fileName)
             self.logger.info(f"Exported file: {fileName}")
 
+    def exportAllAirfoils(self):
+        """Export every airfoil of the project to Selig .dat files."""
+        if not globals.PROJECT.project_airfoils:
+            self.logger.warning("No airfoils to export")
+            return
+
+        points, ok = QInputDialog.getInt(self, "Export All to DAT", "Points per surface:", selig.DEFAULT_POINTS_PER_SIDE, 10, 1000)
+        if not ok:
+            return
+
+        directory = QFileDialog.getExistingDirectory(self, "Export Airfoils to Selig DAT format")
+        if directory:
+            self.logger.info("Exporting all airfoils...")
+            file_names = selig.export_project_airfoils(directory, points)
+            self.logger.info(f"Exported {len(file_names)} files to: {directory}")
+
     def renameAirfoil(self):
         """Rename currently selected airfoil."""
         self.logger.info("Renaming selected airfoil...")
@@ -344,30 +440,46 @@ class MenuBar(QMenuBar):
             # Optionally, update the tree menu display
             selected_item.setText(0, f"{current_airfoil.infos['name']}*")
 
-    def fit2ref(self):
-        """Fit the currently selected airfoil in tree_menu to the reference_airfoil by optimizing its parameters."""
-        self.logger.info("Opening Fit2Ref window...")
-        # Get selected item and corresponding airfoil object
+    def selectedAirfoil(self):
+        """Airfoil object of the item selected in tree_menu, None if there is none."""
         selected_items = self.tree_menu.selectedItems()
         if not selected_items:
             self.logger.warning("No airfoil selected in the tree menu.")
             return None
-        selected_item = selected_items[0]
-        airfoil_name = selected_item.text(0)
+        airfoil_name = selected_items[0].text(0)
         # Find airfoil object by name
-        current_airfoil = None
         for af in globals.PROJECT.project_airfoils:
             if af.infos.get('name', '') == airfoil_name:
-                current_airfoil = af
-                break
+                return af
+        self.logger.warning("Selected airfoil object not found.")
+        return None
+
+    def fit2ref(self):
+        """Fit the currently selected airfoil in tree_menu to the reference_airfoil by optimizing its parameters."""
+        self.logger.info("Opening Fit2Ref window...")
+        current_airfoil = self.selectedAirfoil()
         if current_airfoil is None:
-            self.logger.warning("Selected airfoil object not found.")
             return None
         
         # Open the Fit2RefWindow dialog
-        dlg = fit_2_reference.Fit2RefWindow(parent=self.main_window, current_airfoil=current_airfoil, reference_airfoil=self.main_window.reference_airfoil)
+        dlg = fit_2_reference.Fit2RefWindow(parent=self.main_window, current_airfoil=current_airfoil, reference_airfoil=self.main_window.open_gl.reference,
+                                            viewport=self.main_window.open_gl)
         dlg.exec_()
 
+    def findSimilar(self):
+        """Search a coordinate library for the sections closest in shape to the selected airfoil or to a file."""
+        from src.arfdes.widget_similar import SimilarReferencesWindow
+
+        self.logger.info("Opening similar references window...")
+        dlg = SimilarReferencesWindow(parent=self.main_window, current_airfoil=self.selectedAirfoil(), on_show=self.showReference)
+        dlg.exec_()
+
+    def showReference(self, fileName):
+        """Display a coordinate file as reference, as if it was picked under View > Show reference."""
+        self.logger.info(f"Show reference {fileName}")
+        self.referenceAction.setChecked(True)
+        self.referenceStatus.emit(True, fileName)
+
     def preferencesWindow(self):        
         """Open the preferences dialog."""
         self.logger.info("Open preferences window")
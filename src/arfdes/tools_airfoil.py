@@ -29,62 +29,30 @@ from tqdm import tqdm
 import json
 import src.obj
 import src.globals as globals  # Import from globals.py
+from src.utils.tools_program import adaptive_bspline, curve_sample_count, evaluate_bspline
 
 logger = logging.getLogger(__name__)
 
+class AirfoilFileError(ValueError):
+    """An .arf file that is missing, is not JSON or lacks the keys of a DAEDALUS airfoil."""
+
 def SeligReference(file):
-    """Load airfoil coordinates from a file and return upper and lower points."""
-    AirfoilCoord = []
-    UP_points = []
-    DW_points = []
+    """Load airfoil coordinates from a Selig or Lednicer file and return upper and lower points."""
+    from src.utils.selig import read_coordinates
+
     logger.info("Loading airfoil from database...")
     try:
-        is_name_set = False
-        with open(file) as file:
-            for line in file:
-                try:
-                    x, y = map(float, line.split()) # split X and Y values into 
-                    AirfoilCoord.append([x,y])
-                except ValueError: # skip lines that dont contain numeric data
-                    if is_name_set == False:
-                        if isinstance(line, str):
-                            airfoil_name = line.replace("\n", '', 1)
-                            airfoil_name = " ".join(line.split())
-                            is_name_set = True
-                    continue
+        name, UP_points, DW_points = read_coordinates(file)
     except FileNotFoundError:
         logger.error("No file found!")
-        pass
-            
-    np.array(AirfoilCoord)
-    logger.info("Chosen airfoils data read sucessfully!")
-    
-    i=0
-    while AirfoilCoord[i][1] >= 0:
-        UP_points.append(AirfoilCoord[i])
-        i=i+1
-
-    i=len(UP_points)-1
-    while i < len(AirfoilCoord):
-        DW_points.append(AirfoilCoord[i])
-        i=i+1
-    
-    UP_points = np.array(UP_points)
-    UP_points = UP_points[::-1, :]
-    UP_points = UP_points.T
-    
-    DW_points = np.array(DW_points).T
+        raise
 
-    #logger.debug(UP_points)
-    #logger.debug(DW_points)
-    
     airfoil = src.obj.objects2D.Airfoil_selig_format()
-    #airfoil.full_curve = np.vstack([UP_points, DW_points])
     airfoil.top_curve = UP_points
     airfoil.dwn_curve = DW_points
-    airfoil.infos['name'] = airfoil_name
+    airfoil.infos['name'] = name
     logger.info(f"Finished loading {airfoil.infos['name']} in selig format")
-    
+
     return airfoil
 
 def Reference_load(file):
@@ -93,30 +61,29 @@ def Reference_load(file):
     airfoil = None
     
     if format =="arf":
-        airfoil, _ = load_airfoil_from_json(file)
+        try:
+            airfoil, _ = load_airfoil_from_json(file)
+        except AirfoilFileError as e:
+            logger.error(e)
     else:
-        airfoil = SeligReference(file)
+        # Coordinate files come from the catalog of their library, parsed only when they changed
+        from src.utils.airfoil_catalog import load_reference
+        airfoil = load_reference(file)
     
     return airfoil
 
-def CreateBSpline(const_points, force_resolution=None):
+def CreateBSpline(const_points, force_resolution=None, scale=None):
 
     l=len(const_points[0])
 
-    t=np.linspace(0,1,l-2,endpoint=True)
-    t=np.append([0,0,0],t)
-    t=np.append(t,[1,1,1])
-
-    tck=[t,[const_points[0],const_points[1]],3]
-    
-    
     f = int(globals.DAEDALUS.preferences['general']['performance'])
     if force_resolution:
         f = force_resolution
+    elif globals.DAEDALUS.adaptive_sampling():
+        # Curvature-adaptive sampling, tolerance follows the performance setting
+        return adaptive_bspline(const_points, 3, f, scale)
 
-    u3=np.linspace(0,1,(max(l*f/100,f)),endpoint=True)
-
-    spline = splev(u3, tck)
+    spline = evaluate_bspline(const_points, 3, curve_sample_count(l, f))
 
     return spline
 
@@ -131,55 +98,16 @@ def interpolate_reference(reference, spline_points):
     return np.array([new_x, new_y])
 
 def calculate_error(params, top_ref, dwn_ref):
-    """Define the function to calculate error"""
-    # Extract parameters
-    chord, origin_X, origin_Y, le_thickness, le_depth, le_offset, le_angle, te_thickness, te_depth, te_offset, te_angle, \
-        ps_fwd_angle, ps_rwd_angle, ps_fwd_accel, ps_rwd_accel, ss_fwd_angle, ss_rwd_angle, ss_fwd_accel, ss_rwd_accel = params
-
-    le_angle = math.radians(le_angle)
-    te_angle = math.radians(te_angle)
-    ps_fwd_angle = math.radians(ps_fwd_angle)
-    ps_rwd_angle = math.radians(ps_rwd_angle)
-    ss_fwd_angle = math.radians(ss_fwd_angle)
-    ss_rwd_angle = math.radians(ss_rwd_angle)
-
-    # Leading edge control points
-    p_le_start = [origin_X, origin_Y]
-    a0 = math.tan(le_angle)
-    a1 = math.tan(ps_fwd_angle)
-    a2 = math.tan(ss_fwd_angle)
-    b0 = p_le_start[1] - a0 * p_le_start[0]
-    b1 = p_le_start[1] + le_thickness / 2 - a1 * (p_le_start[0] + le_depth)
-    b2 = p_le_start[1] - le_thickness / 2 - a2 * (p_le_start[0] + le_depth)
-    p_le_t = [(b1 - b0) / (a0 - a1), a0 * ((b1 - b0) / (a0 - a1)) + b0]
-    p_le_d = [(b2 - b0) / (a0 - a2), a0 * ((b2 - b0) / (a0 - a2)) + b0]
-    le_constr = np.vstack([p_le_d, p_le_start, p_le_t]).T
-
-    # Trailing edge control points
-    p_te_start = [origin_X + chord, origin_Y]
-    a3 = math.tan(te_angle)
-    a4 = math.tan(ps_rwd_angle)
-    a5 = math.tan(ss_rwd_angle)
-    b3 = p_te_start[1] - a3 * p_te_start[0]
-    b4 = p_te_start[1] + te_thickness / 2 - a4 * (p_te_start[0] - te_depth)
-    b5 = p_te_start[1] - te_thickness / 2 - a5 * (p_te_start[0] - te_depth)
-    p_te_t = [(b4 - b3) / (a3 - a4), a3 * ((b4 - b3) / (a3 - a4)) + b3]
-    p_te_d = [(b5 - b3) / (a3 - a5), a3 * ((b5 - b3) / (a3 - a5)) + b3]
-    te_constr = np.vstack([p_te_d, p_te_start, p_te_t]).T
-
-    # Create splines
-    le_spline = CreateBSpline(le_constr)
-    te_spline = CreateBSpline(te_constr)
-
-    # Interpolate reference points to match spline length
-    top_ref_interp = interpolate_reference(top_ref, le_spline)
-    dwn_ref_interp = interpolate_reference(dwn_ref, te_spline)
-
-    # Calculate error between splines and reference
-    top_error = np.sum((le_spline[1] - top_ref_interp[1])**2 + (le_spline[0] - top_ref_interp[0])**2)
-    bottom_error = np.sum((te_spline[1] - dwn_ref_interp[1])**2 + (te_spline[0] - dwn_ref_interp[0])**2)
-
-    return top_error + bottom_error
+    """
+    Sum of squared orthogonal distances from the reference points to the airfoil.
+
+    params is a full params row (airfoil_batch.PARAM_NAMES order), top_ref and dwn_ref are [xs, ys] arrays.
+    Every point is projected onto the exact curves, so the result does not depend on the sampling resolution.
+    """
+    from src.obj.curve_projection import orthogonal_error
+
+    ref_points = np.hstack((np.asarray(top_ref, dtype=float), np.asarray(dwn_ref, dtype=float))).T
+    return orthogonal_error(params, ref_points)
 
 def find_t_for_x(desired_x, tck):
     def equation(t):
@@ -191,44 +119,35 @@ def find_t_for_x(desired_x, tck):
     return result.root
 
 def load_airfoil_from_json(fileName):
-    """load the airfoil data from a JSON format file."""
-    error_count = 0
-
-    if fileName:
-        try:
-            with open(f"{fileName}", "r") as file:
-                data = json.load(file)
-        except FileNotFoundError:
-            logger.error("File not found!")
-        except json.JSONDecodeError:
-            logger.error("During decoding JSON!")
-
-    if data:
-        logger.debug("JSON decoded and data loaded to variable")
-        try:
-            airfoil_version = data["program version"]
-        except KeyError as e:
-            logger.error(f"Missing key in ARF data - {e}")
-            logger.warning("File may not load properly or is not compatible with DAEDALUS")
-            return None
-        
-        if airfoil_version:
-            airfoil_version = airfoil_version.split("-")[0].split(".")
-            program_version = globals.DAEDALUS.program_version
-            program_version = program_version.split("-")[0].split(".")
-
-            if program_version[1] != airfoil_version[1] or program_version[0] != airfoil_version[0]:
-                logger.warning("Current program version is different from the saved airfoil version. Import may not be compatible.")
-                if airfoil_version[1] == 1:
-                    logger.info("Trying to load using 0.1.X version")
-                    airfoil, error_count = load_from_ddls_010(data)
-            else:
-                logger.info("Trying to load using 0.3.X version")
-                airfoil, error_count = load_from_ddls_030(data)
+    """load the airfoil data from a JSON format file, returns (airfoil, error_count). Raises AirfoilFileError when the file cannot be loaded."""
+    try:
+        with open(f"{fileName}", "r") as file:
+            data = json.load(file)
+    except OSError as e:
+        raise AirfoilFileError(f"Cannot open {fileName}: {e}") from e
+    except json.JSONDecodeError as e:
+        raise AirfoilFileError(f"{fileName} is not a JSON file: {e}") from e
+
+    logger.debug("JSON decoded and data loaded to variable")
+    if not isinstance(data, dict) or not isinstance(data.get("program version"), str):
+        raise AirfoilFileError(f"{fileName} is not a DAEDALUS airfoil file, it has no program version")
+
+    airfoil_version = data["program version"].split("-")[0].split(".")
+    program_version = globals.DAEDALUS.program_version
+    program_version = program_version.split("-")[0].split(".")
+
+    if airfoil_version[:2] == ["0", "1"] and program_version[:2] != airfoil_version[:2]:
+        logger.warning("Current program version is different from the saved airfoil version. Import may not be compatible.")
+        logger.info("Trying to load using 0.1.X version")
+        airfoil, error_count = load_from_ddls_010(data)
+    else:
+        # Other versions are checked against the program version by the loader itself
+        logger.info("Trying to load using 0.3.X version")
+        airfoil, error_count = load_from_ddls_030(data)
 
-        logger.debug(airfoil)
+    logger.debug(airfoil)
 
-        return airfoil, error_count
+    return airfoil, error_count
 
 def load_from_ddls_010(data):
     """load the airfoil data from a JSON format file."""
@@ -242,35 +161,34 @@ def load_from_ddls_010(data):
         try:
             # Set parameters in Airfoil.params dictionary
             Airfoil.params = {
-                "chord": objects2D["chord"],
-                "origin_X": objects2D["origin_X"],
-                "origin_Y": objects2D["origin_Y"],
-                "le_thickness": objects2D["le_thickness"],
-                "le_depth": objects2D["le_depth"],
-                "le_offset": objects2D["le_offset"],
-                "le_angle": objects2D["le_angle"],
-                "te_thickness": objects2D["te_thickness"],
-                "te_depth": objects2D["te_depth"],
-                "te_offset": objects2D["te_offset"],
-                "te_angle": objects2D["te_angle"],
-                "ps_fwd_angle": objects2D["ps_fwd_angle"],
-                "ps_rwd_angle": objects2D["ps_rwd_angle"],
-                "ps_fwd_accel": objects2D["ps_fwd_accel"],
-                "ps_rwd_accel": objects2D["ps_rwd_accel"],
-                "ss_fwd_angle": objects2D["ss_fwd_angle"],
-                "ss_rwd_angle": objects2D["ss_rwd_angle"],
-                "ss_fwd_accel": objects2D["ss_fwd_accel"],
-                "ss_rwd_accel": objects2D["ss_rwd_accel"]
+                "chord": data["chord"],
+                "origin_X": data["origin_X"],
+                "origin_Y": data["origin_Y"],
+                "le_thickness": data["le_thickness"],
+                "le_depth": data["le_depth"],
+                "le_offset": data["le_offset"],
+                "le_angle": data["le_angle"],
+                "te_thickness": data["te_thickness"],
+                "te_depth": data["te_depth"],
+                "te_offset": data["te_offset"],
+                "te_angle": data["te_angle"],
+                "ps_fwd_angle": data["ps_fwd_angle"],
+                "ps_rwd_angle": data["ps_rwd_angle"],
+                "ps_fwd_accel": data["ps_fwd_accel"],
+                "ps_rwd_accel": data["ps_rwd_accel"],
+                "ss_fwd_angle": data["ss_fwd_angle"],
+                "ss_rwd_angle": data["ss_rwd_angle"],
+                "ss_fwd_accel": data["ss_fwd_accel"],
+                "ss_rwd_accel": data["ss_rwd_accel"]
             }
             Airfoil.infos = {
-                "name": objects2D["infos"]["name"],
-                "creation_date": objects2D["infos"]["creation_date"],
-                "modification_date": objects2D["infos"]["modification_date"],
-                "description": objects2D["infos"]["description"]
+                "name": data["infos"]["name"],
+                "creation_date": data["infos"]["creation_date"],
+                "modification_date": data["infos"]["modification_date"],
+                "description": data["infos"]["description"]
             }
-        except KeyError as e:
-            logger.error(f"ERROR: Missing key in ARF data - {e}")
-            return None
+        except (KeyError, TypeError) as e:
+            raise AirfoilFileError(f"Missing key in ARF data - {e}") from e
 
         Airfoil.update()
 
@@ -292,10 +210,8 @@ def load_from_ddls_030(data):
             airfoil_data = data["airfoil"]
             airfoil_params = airfoil_data["params"]
             airfoil_infos   = airfoil_data["infos"]
-        except KeyError as e:
-            logger.error(f"Missing key in ARF data - {e}")
-            logger.warning("File may not load properly or is not compatible with DAEDALUS")
-            return None
+        except (KeyError, TypeError) as e:
+            raise AirfoilFileError(f"Missing key in ARF data - {e}") from e
         
         if airfoil_version:
             airfoil_version = airfoil_version.split("-")[0].split(".")
@@ -335,9 +251,8 @@ def load_from_ddls_030(data):
                 "modification_date": airfoil_infos["modification_date"],
                 "description":       airfoil_infos["description"]
             }
-        except KeyError as e:
-            logger.error(f"Missing key in ARF data - {e}")
-            return None
+        except (KeyError, TypeError) as e:
+            raise AirfoilFileError(f"Missing key in ARF data - {e}") from e
         
         if is_version_different == True:
             logger.info(f"Airfoil '{Airfoil.infos['name']}' loaded but should be checked!")
@@ -349,10 +264,10 @@ def load_from_ddls_030(data):
 
         return Airfoil, error_count
     
-def save_airfoil_to_json(airfoil_idx=None):
-    """Save the airfoil data to a JSON format file."""
+def save_airfoil_to_json(airfoil_idx=None, airfoil=None):
+    """Save the airfoil data to a JSON format file, either a project airfoil by index or the given airfoil object."""
  
-    current_airfoil = globals.PROJECT.project_airfoils[airfoil_idx]
+    current_airfoil = airfoil if airfoil is not None else globals.PROJECT.project_airfoils[airfoil_idx]
 
     data = {
         "program name": globals.DAEDALUS.program_name,
@@ -0,0 +1,138 @@
+'''
+
+Copyright (C) 2025 Jakub Kamyk
+
+This file is part of DAEDALUS.
+
+DAEDALUS is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+DAEDALUS is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import logging
+import os
+from PyQt5.QtWidgets import (
+    QDialog, QFileDialog, QFormLayout, QHBoxLayout, QHeaderView, QLabel, QLineEdit, QPushButton, QSpinBox,
+    QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget
+)
+
+logger = logging.getLogger(__name__)
+
+# Library searched when the window is first opened, the one of the Wing Module database
+DEFAULT_LIBRARY = 'data'
+
+class SimilarReferencesWindow(QDialog):
+    """Top-k sections of a coordinate library closest in shape to the selected airfoil or to a coordinate file."""
+    def __init__(self, parent=None, current_airfoil=None, library=DEFAULT_LIBRARY, on_show=None):
+        super().__init__(parent)
+        self.setWindowTitle("Find Similar References")
+        self.resize(500, 450)
+        self.current_airfoil = current_airfoil
+        self.on_show = on_show
+        self.results = []
+
+        main_layout = QVBoxLayout()
+        self.setLayout(main_layout)
+
+        form_layout = QFormLayout()
+        self.library_edit = QLineEdit(library)
+        library_button = QPushButton("Browse")
+        library_button.clicked.connect(self.browse_library)
+        library_widget = QWidget()
+        library_layout = QHBoxLayout(library_widget)
+        library_layout.setContentsMargins(0, 0, 0, 0)
+        library_layout.addWidget(self.library_edit)
+        library_layout.addWidget(library_button)
+        form_layout.addRow(QLabel("Library:"), library_widget)
+
+        self.count_box = QSpinBox()
+        self.count_box.setRange(1, 100)
+        self.count_box.setValue(10)
+        form_layout.addRow(QLabel("Results:"), self.count_box)
+        main_layout.addLayout(form_layout)
+
+        button_layout = QHBoxLayout()
+        airfoil_button = QPushButton("Closest to selected airfoil")
+        airfoil_button.setEnabled(current_airfoil is not None)
+        airfoil_button.clicked.connect(self.search_airfoil)
+        file_button = QPushButton("Closest to file...")
+        file_button.clicked.connect(self.search_file)
+        button_layout.addWidget(airfoil_button)
+        button_layout.addWidget(file_button)
+        main_layout.addLayout(button_layout)
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["Distance", "Name", "File"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.cellDoubleClicked.connect(lambda row, _: self.show_reference(row))
+        main_layout.addWidget(self.table)
+
+        self.status_label = QLabel("")
+        main_layout.addWidget(self.status_label)
+
+        show_button = QPushButton("Show as reference")
+        show_button.clicked.connect(lambda: self.show_reference(self.table.currentRow()))
+        main_layout.addWidget(show_button)
+
+    def browse_library(self):
+        directory = QFileDialog.getExistingDirectory(self, "Airfoil Library", self.library_edit.text())
+        if directory:
+            self.library_edit.setText(directory)
+
+    def _index(self):
+        from src.utils.shape_search import get_shape_index
+
+        library = self.library_edit.text()
+        if not os.path.isdir(library):
+            self.status_label.setText(f"{library} is not a directory")
+            return None
+        return get_shape_index(library, refresh=True)
+
+    def search_airfoil(self):
+        index = self._index()
+        if index is not None:
+            self._show_results(index, lambda: index.nearest_to_airfoil(self.current_airfoil, self.count_box.value()))
+
+    def search_file(self):
+        fileName, _ = QFileDialog.getOpenFileName(self, "Open File", "", "All Files (*);;Text Files (*.txt *.dat)")
+        if not fileName:
+            return
+        index = self._index()
+        if index is not None:
+            self._show_results(index, lambda: index.nearest_to_file(fileName, self.count_box.value()))
+
+    def _show_results(self, index, search):
+        import time
+
+        start = time.perf_counter()
+        try:
+            self.results = search()
+        except (OSError, ValueError) as e:
+            logger.error(f"Similarity search failed: {e}")
+            self.status_label.setText(str(e))
+            return
+        elapsed = 1000 * (time.perf_counter() - start)
+
+        self.table.setRowCount(len(self.results))
+        for row, (distance, file, name) in enumerate(self.results):
+            self.table.setItem(row, 0, QTableWidgetItem(f"{distance:.5f}"))
+            self.table.setItem(row, 1, QTableWidgetItem(name))
+            self.table.setItem(row, 2, QTableWidgetItem(file))
+        self.status_label.setText(f"{len(self.results)} of {len(index)} sections in {elapsed:.1f} ms")
+        self.library = index.catalog.directory
+
+    def show_reference(self, row):
+        if not 0 <= row < len(self.results) or self.on_show is None:
+            return
+        self.on_show(os.path.join(self.library, self.results[row][1]))
@@ -33,6 +33,14 @@ def add_airfoil_to_tree(tree_menu=None, name="Unknown", airfoil_obj=None):
     tree_menu.addTopLevelItem(tree_item)
     logger.info(f"Airfoil '{name}' added to the tree")
 
+def add_airfoils_to_tree(tree_menu=None, airfoils=()):
+    """Add many airfoils to the tree menu in one update."""
+    tree_items = [QTreeWidgetItem([airfoil_obj.infos.get('name', 'Unknown'), str(airfoil_obj.infos.get('modification_date', 'Unknown')),
+                                   str(airfoil_obj.infos.get('creation_date', 'Unknown')), airfoil_obj.infos.get('description', 'No description')])
+                  for airfoil_obj in airfoils]
+    tree_menu.addTopLevelItems(tree_items)
+    logger.info(f"{len(tree_items)} airfoils added to the tree")
+
 def refresh_tree(tree_menu=None):
     tree_menu.clear()  # Clear existing items
     for airfoil in globals.PROJECT.project_airfoils:
@@ -34,8 +34,9 @@ from PyQt5.QtWidgets import QDialog, QLabel, QPushButton, QVBoxLayout, QHBoxLayo
 from PyQt5.QtGui import QPixmap, QFont
 from PyQt5.QtCore import Qt
 import webbrowser
-import src.obj.objects3D as objects3D
-import src.obj.objects2D as objects2D
+
+# Curvature-adaptive curve sampling unless the settings file says otherwise
+ADAPTIVE_SAMPLING_DEFAULT = True
 
 class Program:
     def __init__(self):
@@ -50,6 +51,7 @@ class Program:
                     "angle":  "rad"
                 }, # Options: "meters / radians", (future: "milimeters / degrees", "feet / degrees")
                 "performance": 50,  # Options: 10 - 100
+                "adaptive_sampling": ADAPTIVE_SAMPLING_DEFAULT,  # Curvature-adaptive curve sampling, tolerance follows performance
                 "beta_features": False,  # Enable beta features
             },
             'airfoil_designer': {
@@ -138,6 +140,10 @@ class Program:
         except json.JSONDecodeError:
             self.logger.error("Decoding preferences file. Using default settings.")
 
+    def adaptive_sampling(self):
+        """Whether curves are sampled curvature-adaptively, settings without the key get the shipped default."""
+        return bool(self.preferences['general'].get('adaptive_sampling', ADAPTIVE_SAMPLING_DEFAULT))
+
     def showAboutDialog(self, parent=None):
         dialog = QDialog(parent)
         dialog.setWindowTitle("About")
@@ -354,6 +360,7 @@ def loadProject(fileName):
     from src.arfdes.tools_airfoil import load_airfoil_from_json
     from src.utils.tools_program import convert_list_to_ndarray
     from src.obj.objects3D import Component, Wing, Segment  # Import the templates
+    import src.obj.objects2D as objects2D
     base_name = os.path.basename(fileName)
     warning_count = 0
 
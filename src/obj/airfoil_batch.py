@@ -0,0 +1,259 @@
+'''
+
+Copyright (C) 2025 Jakub Kamyk
+
+This file is part of DAEDALUS.
+
+DAEDALUS is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+DAEDALUS is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import logging
+import numpy as np
+
+from src.utils.tools_program import bspline_basis, curve_sample_count
+
+logger = logging.getLogger(__name__)
+
+# Column order of a params array, same as the keys of objects2D.Airfoil.params
+PARAM_NAMES = (
+    "chord", "origin_X", "origin_Y",
+    "le_thickness", "le_depth", "le_offset", "le_angle",
+    "te_thickness", "te_depth", "te_offset", "te_angle",
+    "ps_fwd_angle", "ps_rwd_angle", "ps_fwd_accel", "ps_rwd_accel",
+    "ss_fwd_angle", "ss_rwd_angle", "ss_fwd_accel", "ss_rwd_accel"
+)
+
+KEYS = ('le', 'ps', 'ss', 'te')
+
+def params_to_array(airfoils):
+    """Stack the params of a list of Airfoil objects (or params dicts) into an (N, 19) array."""
+    rows = []
+    for airfoil in airfoils:
+        params = airfoil if isinstance(airfoil, dict) else airfoil.params
+        rows.append([params[name] for name in PARAM_NAMES])
+    return np.array(rows, dtype=float).reshape(-1, len(PARAM_NAMES))
+
+def array_to_params(row):
+    """Convert one row of a params array back into an Airfoil.params dictionary."""
+    return {name: float(value) for name, value in zip(PARAM_NAMES, row)}
+
+class _Dual:
+    """
+    Forward-mode derivative carrier: value (N,) plus gradient (N, n_params).
+
+    Lets the construction formulas below be evaluated once for values and once for their exact
+    Jacobian, instead of being written out twice.
+    """
+    def __init__(self, value, grad):
+        self.value = value
+        self.grad = grad
+
+    def __add__(self, other):
+        if isinstance(other, _Dual):
+            return _Dual(self.value + other.value, self.grad + other.grad)
+        return _Dual(self.value + other, self.grad)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return _Dual(-self.value, -self.grad)
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, other):
+        if isinstance(other, _Dual):
+            return _Dual(self.value * other.value, self.grad * other.value[:, None] + other.grad * self.value[:, None])
+        return _Dual(self.value * other, self.grad * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, _Dual):
+            value = self.value / other.value
+            return _Dual(value, (self.grad - other.grad * value[:, None]) / other.value[:, None])
+        return _Dual(self.value / other, self.grad / other)
+
+def _cosd(x):
+    if isinstance(x, _Dual):
+        return _Dual(np.cos(np.radians(x.value)), -np.sin(np.radians(x.value))[:, None] * np.radians(x.grad))
+    return np.cos(np.radians(x))
+
+def _sind(x):
+    if isinstance(x, _Dual):
+        return _Dual(np.sin(np.radians(x.value)), np.cos(np.radians(x.value))[:, None] * np.radians(x.grad))
+    return np.sin(np.radians(x))
+
+def _tand(x):
+    if isinstance(x, _Dual):
+        value = np.tan(np.radians(x.value))
+        return _Dual(value, (1 + value**2)[:, None] * np.radians(x.grad))
+    return np.tan(np.radians(x))
+
+def _intersect(a, b, a_ref, b_ref):
+    """Intersection of lines y = a*x + b and y = a_ref*x + b_ref, evaluated element-wise."""
+    x = (b - b_ref) / (a_ref - a)
+    return (x, a_ref * x + b_ref)
+
+def _control_points(columns):
+    """Construction formulas of Airfoil.construct(), returns {key: [(x, y), ...]} for arrays or _Dual columns."""
+    (chord, origin_X, origin_Y,
+     le_thickness, le_depth, le_offset, le_angle,
+     te_thickness, te_depth, te_offset, te_angle,
+     ps_fwd_angle, ps_rwd_angle, ps_fwd_accel, ps_rwd_accel,
+     ss_fwd_angle, ss_rwd_angle, ss_fwd_accel, ss_rwd_accel) = columns
+
+    # Leading Edge
+    le_cos = _cosd(le_angle)
+    le_sin = _sind(le_angle)
+    le_start_x = origin_X
+    le_start_y = origin_Y + le_offset
+    le_end_x = le_start_x + le_depth * le_cos
+    le_end_y = le_start_y + le_depth * le_sin
+
+    a0 = _tand(90 + le_angle)
+    a1 = _tand(ps_fwd_angle + le_angle)
+    a2 = _tand(ss_fwd_angle + le_angle)
+
+    b0 = le_start_y - a0 * le_start_x
+    b0p = le_end_y - a0 * le_end_x
+    b1 = le_end_y + le_thickness / 2 * le_cos - a1 * (le_end_x - le_thickness / 2 * le_sin)
+    b2 = le_end_y - le_thickness / 2 * le_cos - a2 * (le_end_x + le_thickness / 2 * le_sin)
+
+    p_le_t = _intersect(a1, b1, a0, b0)
+    p_le_d = _intersect(a2, b2, a0, b0)
+    p_le_ps = _intersect(a1, b1, a0, b0p)
+    p_le_ss = _intersect(a2, b2, a0, b0p)
+
+    # Trailing Edge
+    te_cos = _cosd(te_angle)
+    te_sin = _sind(te_angle)
+    te_start_x = origin_X + chord
+    te_start_y = origin_Y + te_offset
+    te_end_x = te_start_x - te_depth * te_cos
+    te_end_y = te_start_y - te_depth * te_sin
+
+    a3 = _tand(90 + te_angle)
+    a4 = _tand(ps_rwd_angle + te_angle)
+    a5 = _tand(ss_rwd_angle + te_angle)
+
+    b3 = te_start_y - a3 * te_start_x
+    b3p = te_end_y - a3 * te_end_x
+    b4 = te_end_y + te_thickness / 2 * te_cos - a4 * (te_end_x - te_thickness / 2 * te_sin)
+    b5 = te_end_y - te_thickness / 2 * te_cos - a5 * (te_end_x + te_thickness / 2 * te_sin)
+
+    p_te_t = _intersect(a4, b4, a3, b3)
+    p_te_d = _intersect(a5, b5, a3, b3)
+    p_te_ps = _intersect(a4, b4, a3, b3p)
+    p_te_ss = _intersect(a5, b5, a3, b3p)
+
+    # Pressure and Suction Side inner control points
+    ps_1_x = origin_X + ps_fwd_accel
+    ps_2_x = p_te_ps[0] - ps_rwd_accel
+    p_ps_1 = (ps_1_x, a1 * ps_1_x + b1)
+    p_ps_2 = (ps_2_x, a4 * ps_2_x + b4)
+
+    ss_1_x = origin_X + ss_fwd_accel
+    ss_2_x = p_te_ss[0] - ss_rwd_accel
+    p_ss_1 = (ss_1_x, a2 * ss_1_x + b2)
+    p_ss_2 = (ss_2_x, a5 * ss_2_x + b5)
+
+    return {
+        'le': [p_le_ss, p_le_d, p_le_t, p_le_ps],
+        'ps': [p_le_ps, p_ps_1, p_ps_2, p_te_ps],
+        'ss': [p_le_ss, p_ss_1, p_ss_2, p_te_ss],
+        'te': [p_te_ss, p_te_d, p_te_t, p_te_ps],
+    }
+
+def construct_control_points(params_array):
+    """
+    Vectorized version of Airfoil.construct() control polygons.
+
+    params_array: (N, 19) array with columns in PARAM_NAMES order.
+    Returns dict with 'le', 'ps', 'ss', 'te' arrays of shape (N, 2, 4), laid out like Airfoil.constr.
+    """
+    P = np.atleast_2d(np.asarray(params_array, dtype=float))
+    points = _control_points(P.T)
+
+    # [xs, ys] layout of Airfoil.constr for every airfoil
+    return {key: np.stack([np.stack([p[0] for p in pts], axis=-1),
+                           np.stack([p[1] for p in pts], axis=-1)], axis=1) for key, pts in points.items()}
+
+def construct_control_points_with_jacobian(params_array):
+    """
+    Control polygons together with their exact derivatives with respect to the parameters.
+
+    Returns (constr, jac) where constr[key] has shape (N, 2, 4) and jac[key] has shape (N, 2, 4, 19),
+    jac[key][n, c, i, j] being d constr[key][n, c, i] / d params[n, j] (columns in PARAM_NAMES order).
+    """
+    P = np.atleast_2d(np.asarray(params_array, dtype=float))
+    n_airfoils, n_params = P.shape
+    columns = []
+    for j in range(n_params):
+        grad = np.zeros((n_airfoils, n_params))
+        grad[:, j] = 1.0
+        columns.append(_Dual(P[:, j], grad))
+    points = _control_points(columns)
+
+    constr = {}
+    jac = {}
+    for key, pts in points.items():
+        constr[key] = np.stack([np.stack([p[0].value for p in pts], axis=-1),
+                                np.stack([p[1].value for p in pts], axis=-1)], axis=1)
+        jac[key] = np.stack([np.stack([p[0].grad for p in pts], axis=1),
+                             np.stack([p[1].grad for p in pts], axis=1)], axis=1)
+    return constr, jac
+
+def construct_many(params_array, resolution=None):
+    """
+    Construct N airfoils in one NumPy pass.
+
+    params_array: (N, 19) array with columns in PARAM_NAMES order.
+    resolution: samples per curve, defaults to the 'performance' preference like CreateBSpline.
+    Returns (geom, constr) dicts keyed 'le', 'ps', 'ss', 'te' with arrays of shape
+    (N, 2, n_samples) and (N, 2, 4) respectively.
+    """
+    constr = construct_control_points(params_array)
+
+    geom = {}
+    for key in KEYS:
+        n_ctrl = constr[key].shape[2]
+        basis = bspline_basis(n_ctrl, 3, curve_sample_count(n_ctrl, resolution))
+        geom[key] = constr[key] @ basis.T
+
+    logger.debug(f"Constructed {len(next(iter(constr.values())))} airfoils in batch")
+    return geom, constr
+
+def construct_many_with_jacobian(params_array, resolution=None):
+    """
+    construct_many() plus exact parameter derivatives of the control points and curve samples.
+
+    Returns (geom, constr, d_geom, d_constr); d_geom[key] has shape (N, 2, n_samples, 19) and
+    d_constr[key] (N, 2, 4, 19). Curves are linear in their control points, so the curve Jacobian
+    is the control point Jacobian pushed through the same basis matrix.
+    """
+    constr, d_constr = construct_control_points_with_jacobian(params_array)
+
+    geom = {}
+    d_geom = {}
+    for key in KEYS:
+        n_ctrl = constr[key].shape[2]
+        basis = bspline_basis(n_ctrl, 3, curve_sample_count(n_ctrl, resolution))
+        geom[key] = constr[key] @ basis.T
+        d_geom[key] = np.einsum('mi,ncij->ncmj', basis, d_constr[key])
+
+    return geom, constr, d_geom, d_constr
@@ -0,0 +1,242 @@
+'''
+
+Copyright (C) 2025 Jakub Kamyk
+
+This file is part of DAEDALUS.
+
+DAEDALUS is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+DAEDALUS is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from tqdm import tqdm
+
+import src.globals as globals
+from src.obj.airfoil_batch import PARAM_NAMES, params_to_array
+from src.obj.section_properties import DEFAULT_STATIONS, batch_properties
+
+logger = logging.getLogger(__name__)
+
+# Scalar section properties stored for every design point
+RESULT_COLUMNS = ('area', 'centroid_x', 'centroid_y', 'Ixx', 'Iyy', 'Ixy',
+                  'max_thickness', 'max_thickness_x', 'max_camber', 'max_camber_x')
+
+MANIFEST = 'sweep.json'
+
+def _base_params(base_params=None):
+    """Params the design is applied on top of, a default Airfoil unless given."""
+    if base_params is None:
+        import src.obj.objects2D as objects2D
+        base_params = objects2D.Airfoil().params
+    return dict(base_params)
+
+def _check_names(names):
+    unknown = [name for name in names if name not in PARAM_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown airfoil parameters: {', '.join(unknown)}")
+
+def _check_ranges(ranges):
+    """Every range must be a (low, high) pair of numbers with low <= high."""
+    for name, spec in ranges.items():
+        try:
+            low, high = (float(bound) for bound in spec)
+        except (TypeError, ValueError):
+            raise ValueError(f"Range of {name} must be a (low, high) pair, got {spec!r}") from None
+        if low > high:
+            raise ValueError(f"Range of {name} has low > high: {spec!r}")
+
+def grid_design(ranges=None, levels=5, values=None):
+    """
+    Full factorial design: ranges {name: (low, high)} give 'levels' evenly spaced values each, values
+    {name: [v0, v1, ...]} explicit ones.
+
+    Returns (names, values) with values of shape (n_points, len(names)).
+    """
+    ranges = dict(ranges or {})
+    values = dict(values or {})
+    _check_ranges(ranges)
+    both = set(ranges) & set(values)
+    if both:
+        raise ValueError(f"Parameters given both a range and values: {', '.join(sorted(both))}")
+    names = list(ranges) + list(values)
+    _check_names(names)
+    axes = [np.linspace(low, high, levels) for low, high in ranges.values()]
+    for name, spec in values.items():
+        axis = np.atleast_1d(np.asarray(spec, dtype=float))
+        if axis.ndim != 1 or not len(axis):
+            raise ValueError(f"Values of {name} must be a non-empty list of numbers")
+        axes.append(axis)
+    design = np.array(list(itertools.product(*axes)), dtype=float).reshape(-1, len(names))
+    return names, design
+
+def latin_hypercube(ranges, n_points, seed=None):
+    """
+    Latin hypercube design of n_points over {name: (low, high)}, one point per stratum of every parameter.
+
+    Returns (names, values) with values of shape (n_points, len(names)).
+    """
+    names = list(ranges)
+    _check_names(names)
+    _check_ranges(ranges)
+    rng = np.random.default_rng(seed)
+    unit = (rng.random((n_points, len(names))) + np.arange(n_points)[:, None]) / n_points
+    for j in range(len(names)):
+        unit[:, j] = rng.permutation(unit[:, j])
+    low = np.array([ranges[name][0] for name in names], dtype=float)
+    high = np.array([ranges[name][1] for name in names], dtype=float)
+    return names, low + unit * (high - low)
+
+def design_to_params(names, values, base_params=None):
+    """Expand a design over some parameters into a full (n_points, 19) params array."""
+    _check_names(names)
+    params_array = np.repeat(params_to_array([_base_params(base_params)]), len(values), axis=0)
+    for j, name in enumerate(names):
+        params_array[:, PARAM_NAMES.index(name)] = values[:, j]
+    return params_array
+
+def evaluate_chunk(params_array, resolution, n_stations=DEFAULT_STATIONS):
+    """Section properties of one chunk of design points, as {column: (n,) array}. Runs in the worker processes."""
+    props = batch_properties(params_array, resolution, n_stations)
+    return {
+        'area': props['area'],
+        'centroid_x': props['centroid'][:, 0],
+        'centroid_y': props['centroid'][:, 1],
+        'Ixx': props['Ixx'],
+        'Iyy': props['Iyy'],
+        'Ixy': props['Ixy'],
+        'max_thickness': props['max_thickness'],
+        'max_thickness_x': props['max_thickness_x'],
+        'max_camber': props['max_camber'],
+        'max_camber_x': props['max_camber_x']
+    }
+
+def _chunk_path(output_dir, index):
+    return os.path.join(output_dir, f"chunk_{index:05d}.npz")
+
+def _write_chunk(path, params_array, results):
+    """Write through a temporary file so an interrupted sweep never leaves a half written chunk behind."""
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, params=params_array, **results)
+    os.replace(tmp_path, path)
+
+def run_sweep(params_array, output_dir, chunk_size=256, workers=None, resolution=None, n_stations=DEFAULT_STATIONS):
+    """
+    Evaluate a (N, 19) params array on a process pool, streaming results to output_dir/chunk_XXXXX.npz.
+
+    Every chunk holds the 'params' array plus one array per RESULT_COLUMNS entry. Calling run_sweep again
+    with the same design and output_dir resumes it, finished chunks are skipped. Returns the chunk paths.
+    """
+    params_array = np.atleast_2d(np.asarray(params_array, dtype=float))
+    resolution = int(resolution or globals.DAEDALUS.preferences['general']['performance'])
+    os.makedirs(output_dir, exist_ok=True)
+
+    digest = hashlib.sha1(params_array.tobytes()).hexdigest()
+    manifest = {'design': digest, 'n_points': len(params_array), 'chunk_size': chunk_size,
+                'resolution': resolution, 'n_stations': n_stations, 'columns': ['params', *RESULT_COLUMNS]}
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            existing = json.load(f)
+        if existing != manifest:
+            raise ValueError(f"{output_dir} holds a different sweep, use another output directory")
+    else:
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=4)
+
+    starts = range(0, len(params_array), chunk_size)
+    paths = [_chunk_path(output_dir, i) for i in range(len(starts))]
+    pending = [(i, start) for i, start in enumerate(starts) if not os.path.exists(paths[i])]
+    if len(pending) < len(paths):
+        logger.info(f"Resuming sweep, {len(paths) - len(pending)} of {len(paths)} chunks already done")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(evaluate_chunk, params_array[start:start + chunk_size], resolution, n_stations): (i, start)
+                   for i, start in pending}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Sweep", unit="chunk"):
+            i, start = futures[future]
+            _write_chunk(paths[i], params_array[start:start + chunk_size], future.result())
+
+    logger.info(f"Sweep of {len(params_array)} airfoils written to {output_dir}")
+    return paths
+
+def load_sweep(output_dir):
+    """Concatenate the finished chunks of a sweep into {column: array}, rows in design order."""
+    with open(os.path.join(output_dir, MANIFEST), 'r') as f:
+        manifest = json.load(f)
+    n_chunks = -(-manifest['n_points'] // manifest['chunk_size'])
+    chunks = []
+    for i in range(n_chunks):
+        path = _chunk_path(output_dir, i)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                chunks.append({key: data[key] for key in manifest['columns']})
+        else:
+            logger.warning(f"Sweep chunk {i} missing, run the sweep again to resume it")
+    if not chunks:
+        return {}
+    return {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+
+def _parse_range(text):
+    """'name=low:high' -> (name, (low, high))"""
+    name, bounds = text.split('=')
+    low, high = bounds.split(':')
+    return name, (float(low), float(high))
+
+def _parse_values(text):
+    """'name=v0,v1,...' -> (name, [v0, v1, ...])"""
+    name, values = text.split('=')
+    return name, [float(value) for value in values.split(',')]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless airfoil parameter sweep")
+    parser.add_argument('ranges', nargs='*', help="parameter ranges as name=low:high")
+    parser.add_argument('--values', nargs='+', default=[], help="explicit grid values as name=v0,v1,...")
+    parser.add_argument('--out', required=True, help="output directory, reused to resume a sweep")
+    parser.add_argument('--lhs', type=int, help="latin hypercube with this many points instead of a grid")
+    parser.add_argument('--levels', type=int, default=5, help="grid levels per parameter")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--base', help=".arf file whose params the design is applied to")
+    parser.add_argument('--chunk-size', type=int, default=256)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--resolution', type=int)
+    args = parser.parse_args(argv)
+
+    ranges = dict(_parse_range(text) for text in args.ranges)
+    if args.lhs:
+        if args.values:
+            parser.error("--values only applies to a grid")
+        names, values = latin_hypercube(ranges, args.lhs, args.seed)
+    else:
+        names, values = grid_design(ranges, args.levels, dict(_parse_values(text) for text in args.values))
+
+    base_params = None
+    if args.base:
+        from src.arfdes.tools_airfoil import AirfoilFileError, load_airfoil_from_json
+        try:
+            base_params = load_airfoil_from_json(args.base)[0].params
+        except AirfoilFileError as e:
+            parser.error(str(e))
+
+    run_sweep(design_to_params(names, values, base_params), args.out, args.chunk_size, args.workers, args.resolution)
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,119 @@
+'''
+
+Copyright (C) 2025 Jakub Kamyk
+
+This file is part of DAEDALUS.
+
+DAEDALUS is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+DAEDALUS is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import logging
+from math import comb
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Samples per curve the Newton iteration is started from. It has to land in the basin of the global foot point:
+# with 8 the trailing edge points of strongly cambered sections (S1223, S1221) ended on a local minimum.
+SEED_SAMPLES = 32
+
+# Newton steps at most, the iteration stops earlier once no parameter moves by more than NEWTON_TOL
+NEWTON_STEPS = 20
+NEWTON_TOL = 1e-12
+
+def bernstein(t, degree):
+    """Bernstein basis of the given degree at parameters t, shape t.shape + (degree + 1,)."""
+    t = np.asarray(t, dtype=float)[..., None]
+    i = np.arange(degree + 1)
+    coefficients = np.array([comb(degree, k) for k in i], dtype=float)
+    return coefficients * t**i * (1 - t)**(degree - i)
+
+def power_coefficients(ctrl):
+    """Monomial coefficients (..., 2, n) of Bezier curves given by (..., 2, n) control points, C(t) = sum a_j t^j."""
+    degree = ctrl.shape[-1] - 1
+    conversion = np.zeros((degree + 1, degree + 1))
+    for i in range(degree + 1):
+        for j in range(i, degree + 1):
+            conversion[i, j] = comb(degree, i) * comb(degree - i, j - i) * (-1)**(j - i)
+    return ctrl @ conversion
+
+def _horner(coefficients, t):
+    """Polynomials with (K, 2, m) coefficients at (N, K) parameters, (N, K, 2)."""
+    t = t[..., None]
+    value = np.broadcast_to(coefficients[..., -1], t.shape[:-1] + (2,))
+    for j in range(coefficients.shape[-1] - 2, -1, -1):
+        value = value * t + coefficients[..., j]
+    return value
+
+def _evaluate(coefficients, t):
+    """Point, first and second derivative of curves with (K, 2, n) monomial coefficients at (N, K) parameters."""
+    powers = np.arange(coefficients.shape[-1])
+    d1 = coefficients[..., 1:] * powers[1:]
+    d2 = d1[..., 1:] * powers[1:-1]
+    point = _horner(coefficients, t)
+    return point, _horner(d1, t), _horner(d2, t) if d2.shape[-1] else np.zeros_like(point)
+
+def project_points(ctrl, points, seed_samples=SEED_SAMPLES, newton_steps=NEWTON_STEPS, tol=NEWTON_TOL):
+    """
+    Closest points of a set of Bezier curves to every query point.
+
+    ctrl: (K, 2, n) control polygons, e.g. the four pieces of an airfoil; points: (N, 2).
+    Every point is projected onto every curve: the best of seed_samples uniform parameters is refined with
+    Newton steps on (C(t) - p) . C'(t) = 0, clamped to [0, 1], until no parameter moves by more than tol,
+    then the closest curve wins.
+    Returns (curve index (N,), parameter t (N,), foot point (N, 2)).
+    """
+    ctrl = np.asarray(ctrl, dtype=float)
+    points = np.asarray(points, dtype=float)
+    degree = ctrl.shape[-1] - 1
+
+    t_seed = np.linspace(0, 1, seed_samples)
+    seeds = ctrl @ bernstein(t_seed, degree).T                                              # (K, 2, S)
+    d2 = ((seeds[None] - points[:, None, :, None])**2).sum(axis=2)                          # (N, K, S)
+    t = t_seed[np.argmin(d2, axis=-1)]                                                      # (N, K)
+
+    coefficients = power_coefficients(ctrl)
+    for _ in range(newton_steps):
+        point, d1, dd = _evaluate(coefficients, t)
+        r = point - points[:, None, :]
+        f = (r * d1).sum(axis=-1)
+        speed = (d1 * d1).sum(axis=-1)
+        fp = speed + (r * dd).sum(axis=-1)
+        # Away from the minimum f' can turn negative, fall back to the Gauss-Newton step there
+        fp = np.where(fp > 0, fp, speed)
+        t_new = np.clip(t - f / np.maximum(fp, 1e-30), 0.0, 1.0)
+        converged = np.abs(t_new - t).max(initial=0.0) <= tol
+        t = t_new
+        if converged:
+            break
+
+    point = _horner(coefficients, t)
+    distances = ((point - points[:, None, :])**2).sum(axis=-1)
+    curve = np.argmin(distances, axis=-1)
+    rows = np.arange(len(points))
+    return curve, t[rows, curve], point[rows, curve]
+
+def airfoil_pieces(params_row):
+    """The four Bezier pieces (le, ps, ss, te) of one airfoil params row as a (4, 2, 4) array."""
+    from src.obj.airfoil_batch import KEYS, construct_control_points
+
+    constr = construct_control_points(np.asarray(params_row, dtype=float)[None, :])
+    return np.stack([constr[key][0] for key in KEYS])
+
+def orthogonal_error(params_row, ref_points):
+    """Sum of squared orthogonal distances from the (N, 2) ref_points to the airfoil of a params row."""
+    ref_points = np.asarray(ref_points, dtype=float)
+    _, _, foot = project_points(airfoil_pieces(params_row), ref_points)
+    return float(((foot - ref_points)**2).sum())
@@ -0,0 +1,120 @@
+'''
+
+Copyright (C) 2025 Jakub Kamyk
+
+This file is part of DAEDALUS.
+
+DAEDALUS is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+DAEDALUS is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import numpy as np
+
+class GeometryStore:
+    """
+    Dict-like container keeping all curves of an object ('le', 'ps', 'ss', 'te', ...) in one
+    contiguous float64 buffer.
+
+    Items are returned as read/write numpy views into the buffer, so consumers never need to
+    re-np.array() them. Assigning a value of the same shape overwrites it in place, any other
+    assignment repacks the buffer. Empty entries read back as [] like the plain dicts did.
+
+    Because of the in-place writes a view read before an update shows the new values afterwards;
+    code that keeps curves between updates (e.g. to compare or undo) must store np.array() copies.
+    """
+    __slots__ = ('buffer', '_keys', '_shapes', '_offsets')
+
+    def __init__(self, keys=(), values=None):
+        self.buffer = np.empty(0, dtype=np.float64)
+        self._keys = list(keys)
+        self._shapes = {key: (0,) for key in self._keys}
+        self._offsets = {key: 0 for key in self._keys}
+        if values:
+            self.update(values)
+
+    def _pack(self, arrays):
+        """Rebuild the buffer from {key: array}, keeping the key order."""
+        sizes = [arrays[key].size for key in self._keys]
+        buffer = np.empty(sum(sizes), dtype=np.float64)
+        offset = 0
+        for key, size in zip(self._keys, sizes):
+            buffer[offset:offset + size] = arrays[key].ravel()
+            self._shapes[key] = arrays[key].shape
+            self._offsets[key] = offset
+            offset += size
+        self.buffer = buffer
+
+    def _view(self, key):
+        shape = self._shapes[key]
+        offset = self._offsets[key]
+        return self.buffer[offset:offset + int(np.prod(shape))].reshape(shape)
+
+    def __getitem__(self, key):
+        """
+        Live view of an entry. A later assignment of the same shape overwrites it in place, so the view changes
+        under its holder; copy it before keeping it across geometry updates.
+        """
+        if self._shapes[key] == (0,):
+            return []
+        return self._view(key)
+
+    def __setitem__(self, key, value):
+        self.update({key: value})
+
+    def update(self, values):
+        """Assign several entries at once with a single repack of the buffer."""
+        values = {key: np.asarray(value, dtype=np.float64) for key, value in dict(values).items()}
+        for key in values:
+            if key not in self._shapes:
+                self._keys.append(key)
+                self._shapes[key] = (0,)
+                self._offsets[key] = self.buffer.size
+
+        if all(values[key].shape == self._shapes[key] for key in values):
+            for key, value in values.items():
+                self._view(key)[...] = value
+            return
+
+        arrays = {key: values[key] if key in values else self._view(key) for key in self._keys}
+        self._pack(arrays)
+
+    def clear(self):
+        """Empty every entry, keeping the keys."""
+        self.buffer = np.empty(0, dtype=np.float64)
+        self._shapes = {key: (0,) for key in self._keys}
+        self._offsets = {key: 0 for key in self._keys}
+
+    def get(self, key, default=None):
+        return self[key] if key in self._shapes else default
+
+    def keys(self):
+        return list(self._keys)
+
+    def values(self):
+        return [self[key] for key in self._keys]
+
+    def items(self):
+        return [(key, self[key]) for key in self._keys]
+
+    def __contains__(self, key):
+        return key in self._shapes
+
+    def __iter__(self):
+        return iter(list(self._keys))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        shapes = ', '.join(f"'{key}': {self._shapes[key]}" for key in self._keys)
+        return f"GeometryStore({{{shapes}}})"
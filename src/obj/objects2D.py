@@ -23,8 +23,34 @@ import math
 import numpy as np
 
 from src.arfdes.tools_airfoil import CreateBSpline
+from src.obj.geometry import GeometryStore
 import src.globals as globals
 
+PARTS = ('le', 'ps', 'ss', 'te')
+
+# Pieces of the airfoil each parameter takes part in, used by Airfoil.update() for partial rebuilds
+PARAM_DEPENDENCIES = {
+    "chord":        ('le', 'te', 'ps', 'ss'),  # le too: the adaptive sampling tolerance scales with the chord
+    "origin_X":     ('le', 'ps', 'ss', 'te'),
+    "origin_Y":     ('le', 'ps', 'ss', 'te'),
+    "le_thickness": ('le', 'ps', 'ss'),
+    "le_depth":     ('le', 'ps', 'ss'),
+    "le_offset":    ('le', 'ps', 'ss'),
+    "le_angle":     ('le', 'ps', 'ss'),
+    "te_thickness": ('te', 'ps', 'ss'),
+    "te_depth":     ('te', 'ps', 'ss'),
+    "te_offset":    ('te', 'ps', 'ss'),
+    "te_angle":     ('te', 'ps', 'ss'),
+    "ps_fwd_angle": ('le', 'ps'),
+    "ps_rwd_angle": ('te', 'ps'),
+    "ps_fwd_accel": ('ps',),
+    "ps_rwd_accel": ('ps',),
+    "ss_fwd_angle": ('le', 'ss'),
+    "ss_rwd_angle": ('te', 'ss'),
+    "ss_fwd_accel": ('ss',),
+    "ss_rwd_accel": ('ss',)
+}
+
 class Airfoil_selig_format:
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -90,22 +116,27 @@ class Airfoil:
             "ss_rwd_accel": "length"
         }
 
-        self.geom = {
-            'le': [],
-            'ps': [],
-            'ss': [],
-            'te': []
-        }
+        self.geom = GeometryStore(PARTS)
 
-        self.constr = {
-            'le': [],
-            'ps': [],
-            'ss': [],
-            'te': []
-        }
+        self.constr = GeometryStore(PARTS)
 
-    def construct(self):
-        # Leading Edge calculations
+        # Geometry cache bookkeeping: 'version' is bumped every time geom/constr are rebuilt
+        self.version = 0
+        self._state = None
+        self._properties = None
+
+    def state_key(self):
+        """Return a hashable snapshot of everything the geometry depends on (params and sampling settings)."""
+        resolution = int(globals.DAEDALUS.preferences['general']['performance'])
+        adaptive = globals.DAEDALUS.adaptive_sampling()
+        return (tuple(self.params.items()), (resolution, adaptive))
+
+    def invalidate(self):
+        """Force the next update() call to rebuild the geometry."""
+        self._state = None
+
+    def _le_lines(self):
+        """Leading edge construction lines shared by the LE, PS and SS pieces."""
         p_le_start = [self.params['origin_X'], self.params['origin_Y']+self.params['le_offset']]
         p_le_end = [p_le_start[0]+self.params['le_depth']*math.cos(np.radians(self.params['le_angle'])),p_le_start[1]+(self.params['le_depth']*math.sin(np.radians(self.params['le_angle'])))]
 
@@ -118,13 +149,10 @@ class Airfoil:
         b1 = p_le_end[1]+(self.params['le_thickness']/2*math.cos(np.radians(self.params['le_angle'])))-a1*(p_le_end[0]-self.params['le_thickness']/2*math.sin(np.radians(self.params['le_angle'])))
         b2 = p_le_end[1]-(self.params['le_thickness']/2*math.cos(np.radians(self.params['le_angle'])))-a2*(p_le_end[0]+self.params['le_thickness']/2*math.sin(np.radians(self.params['le_angle'])))
 
-        p_le_t = [(b1-b0)/(a0-a1),a0*((b1-b0)/(a0-a1))+b0] # G1 upper point
-        p_le_d = [(b2-b0)/(a0-a2),a0*((b2-b0)/(a0-a2))+b0] # G1 lower point
-        p_le_ps = [(b1-b0p)/(a0-a1),a0*((b1-b0p)/(a0-a1))+b0p] # G0 with with the pressure side
-        p_le_ss = [(b2-b0p)/(a0-a2),a0*((b2-b0p)/(a0-a2))+b0p] # G0 with with the suction side
-
-        le_constr = np.vstack([p_le_ss, p_le_d, p_le_t, p_le_ps]).T
+        return a0, a1, a2, b0, b0p, b1, b2
 
+    def _te_lines(self):
+        """Trailing edge construction lines shared by the TE, PS and SS pieces."""
         p_te_start = [self.params['origin_X']+self.params['chord'], self.params['origin_Y']+self.params['te_offset']]
         p_te_end = [p_te_start[0]-self.params['te_depth']*math.cos(np.radians(self.params['te_angle'])), p_te_start[1]-(self.params['te_depth']*math.sin(np.radians(self.params['te_angle'])))]
         a3 = math.tan(np.radians(90+self.params['te_angle']))
@@ -135,32 +163,106 @@ class Airfoil:
         b4 = p_te_end[1]+(self.params['te_thickness']/2*math.cos(np.radians(self.params['te_angle'])))-a4*(p_te_end[0]-self.params['te_thickness']/2*math.sin(np.radians(self.params['te_angle'])))
         b5 = p_te_end[1]-(self.params['te_thickness']/2*math.cos(np.radians(self.params['te_angle'])))-a5*(p_te_end[0]+self.params['te_thickness']/2*math.sin(np.radians(self.params['te_angle'])))
 
-        p_te_t = [(b4-b3)/(a3-a4),a3*((b4-b3)/(a3-a4))+b3] # G1 upper point
-        p_te_d = [(b5-b3)/(a3-a5),a3*((b5-b3)/(a3-a5))+b3] # G1 lower point
-        p_te_ps = [(b4-b3p)/(a3-a4),a3*((b4-b3p)/(a3-a4))+b3p] # G0 with with the pressure side
-        p_te_ss = [(b5-b3p)/(a3-a5),a3*((b5-b3p)/(a3-a5))+b3p] # G0 with with the suction side
+        return a3, a4, a5, b3, b3p, b4, b5
+
+    def construct_parts(self, parts=('le', 'ps', 'ss', 'te')):
+        """Build control polygons and splines of the requested pieces only, returns (geom, constr) dicts."""
+        parts = set(parts)
+        constr = {}
+
+        if parts & {'le', 'ps', 'ss'}:
+            a0, a1, a2, b0, b0p, b1, b2 = self._le_lines()
+            p_le_ps = [(b1-b0p)/(a0-a1),a0*((b1-b0p)/(a0-a1))+b0p] # G0 with with the pressure side
+            p_le_ss = [(b2-b0p)/(a0-a2),a0*((b2-b0p)/(a0-a2))+b0p] # G0 with with the suction side
+
+        if parts & {'te', 'ps', 'ss'}:
+            a3, a4, a5, b3, b3p, b4, b5 = self._te_lines()
+            p_te_ps = [(b4-b3p)/(a3-a4),a3*((b4-b3p)/(a3-a4))+b3p] # G0 with with the pressure side
+            p_te_ss = [(b5-b3p)/(a3-a5),a3*((b5-b3p)/(a3-a5))+b3p] # G0 with with the suction side
+
+        if 'le' in parts:
+            p_le_t = [(b1-b0)/(a0-a1),a0*((b1-b0)/(a0-a1))+b0] # G1 upper point
+            p_le_d = [(b2-b0)/(a0-a2),a0*((b2-b0)/(a0-a2))+b0] # G1 lower point
+            constr['le'] = np.vstack([p_le_ss, p_le_d, p_le_t, p_le_ps]).T
 
-        te_constr = np.vstack([p_te_ss, p_te_d, p_te_t, p_te_ps]).T
+        if 'te' in parts:
+            p_te_t = [(b4-b3)/(a3-a4),a3*((b4-b3)/(a3-a4))+b3] # G1 upper point
+            p_te_d = [(b5-b3)/(a3-a5),a3*((b5-b3)/(a3-a5))+b3] # G1 lower point
+            constr['te'] = np.vstack([p_te_ss, p_te_d, p_te_t, p_te_ps]).T
 
-        p_ps_le = p_le_ps
-        p_ps_te = p_te_ps
-        p_ps_1 = [self.params['origin_X']+self.params['ps_fwd_accel'], a1*(self.params['origin_X']+self.params['ps_fwd_accel'])+b1]
-        p_ps_2 = [p_ps_te[0]-self.params['ps_rwd_accel'], a4*(p_ps_te[0]-self.params['ps_rwd_accel'])+b4]   
-        ps_constr = np.vstack([p_ps_le, p_ps_1, p_ps_2, p_ps_te]).T
-        p_ss_le = p_le_ss
-        p_ss_te = p_te_ss
-        p_ss_1 = [self.params['origin_X']+self.params['ss_fwd_accel'], a2*(self.params['origin_X']+self.params['ss_fwd_accel'])+b2]
-        p_ss_2 = [p_ss_te[0]-self.params['ss_rwd_accel'], a5*(p_ss_te[0]-self.params['ss_rwd_accel'])+b5]   
-        ss_constr = np.vstack([p_ss_le, p_ss_1, p_ss_2, p_ss_te]).T
+        if 'ps' in parts:
+            p_ps_1 = [self.params['origin_X']+self.params['ps_fwd_accel'], a1*(self.params['origin_X']+self.params['ps_fwd_accel'])+b1]
+            p_ps_2 = [p_te_ps[0]-self.params['ps_rwd_accel'], a4*(p_te_ps[0]-self.params['ps_rwd_accel'])+b4]
+            constr['ps'] = np.vstack([p_le_ps, p_ps_1, p_ps_2, p_te_ps]).T
+
+        if 'ss' in parts:
+            p_ss_1 = [self.params['origin_X']+self.params['ss_fwd_accel'], a2*(self.params['origin_X']+self.params['ss_fwd_accel'])+b2]
+            p_ss_2 = [p_te_ss[0]-self.params['ss_rwd_accel'], a5*(p_te_ss[0]-self.params['ss_rwd_accel'])+b5]
+            constr['ss'] = np.vstack([p_le_ss, p_ss_1, p_ss_2, p_te_ss]).T
 
         # Generate Splines
-        le_spline = CreateBSpline(le_constr)
-        te_spline = CreateBSpline(te_constr)
-        ps_spline = CreateBSpline(ps_constr)
-        ss_spline = CreateBSpline(ss_constr)
+        geom = {key: CreateBSpline(constr[key], scale=self.params['chord']) for key in constr}
+
+        return geom, constr
+
+    def construct_with_jacobian(self, resolution=None):
+        """
+        Construct the airfoil together with the exact derivatives of its geometry w.r.t. its parameters.
+
+        Returns (geom, constr, d_geom, d_constr) dicts keyed 'le', 'ps', 'ss', 'te'. d_constr[key] has
+        shape (2, 4, 19) and d_geom[key] (2, n_samples, 19), the last axis following the params order.
+        """
+        import src.obj.airfoil_batch as airfoil_batch
+
+        geom, constr, d_geom, d_constr = airfoil_batch.construct_many_with_jacobian(airfoil_batch.params_to_array([self]), resolution)
+        return ({key: geom[key][0] for key in PARTS}, {key: constr[key][0] for key in PARTS},
+                {key: d_geom[key][0] for key in PARTS}, {key: d_constr[key][0] for key in PARTS})
+
+    def construct(self):
+        geom, constr = self.construct_parts()
+        return geom['le'], geom['ps'], geom['ss'], geom['te'], constr['le'], constr['ps'], constr['ss'], constr['te']
+
+    def _changed_parts(self, state):
+        """Pieces (le/ps/ss/te) affected by the difference between the last built state and the given one."""
+        if self._state is None or self._state[1] != state[1]:
+            return set(PARTS)
+
+        old_params = dict(self._state[0])
+        parts = set()
+        for key, value in self.params.items():
+            if key in old_params and old_params[key] == value:
+                continue
+            if key not in PARAM_DEPENDENCIES:
+                return set(PARTS)
+            parts.update(PARAM_DEPENDENCIES[key])
+        return parts
+
+    def update(self, force=False):
+        """Rebuild the pieces of geom/constr affected by parameter or resolution changes since the last build."""
+        state = self.state_key()
+        if not force and state == self._state:
+            return False
+
+        parts = set(PARTS) if force else self._changed_parts(state)
+        if parts == set(PARTS):
+            self.logger.info("Recalculating airfoil geometry...")
+        else:
+            self.logger.info(f"Recalculating airfoil geometry ({', '.join(sorted(parts))})...")
+
+        geom, constr = self.construct_parts(parts)
+        self.geom.update(geom)
+        self.constr.update(constr)
+        self._state = state
+        self.version += 1
+        return True
 
-        return le_spline, ps_spline, ss_spline, te_spline, le_constr, ps_constr, ss_constr, te_constr
+    def section_properties(self, n_stations=None):
+        """Area, centroid, second moments, thickness and camber of the airfoil, cached per geometry version."""
+        import src.obj.section_properties as section_properties
 
-    def update(self):
-        self.logger.info("Recalculating airfoil geometry...")
-        self.geom['le'], self.geom['ps'], self.geom['ss'], self.geom['te'], self.constr['le'], self.constr['ps'], self.constr['ss'], self.constr['te']= self.construct()
\ No newline at end of file
+        n_stations = n_stations or section_properties.DEFAULT_STATIONS
+        self.update()
+        key = (self.version, n_stations)
+        if self._properties is None or self._properties[0] != key:
+            self._properties = (key, section_properties.airfoil_properties(self, n_stations))
+        return self._properties[1]
@@ -26,6 +26,7 @@ from geomdl import BSpline, utilities
 from src.utils.tools_program import CreateBSpline_3D
 import src.globals as globals
 import src.obj.objects2D as objects2D
+from src.obj.geometry import GeometryStore
 
 from geomdl import NURBS
 from geomdl import tessellate
@@ -52,23 +53,9 @@ class Segment:
             #'curv_theta': 0   
         }
 
-        self.control_points = {
-            'le': [],
-            'ps': [],
-            'ss': [],
-            'te': [],
-            'le_ps': [],
-            'te_ps': [],
-            'le_ss': [],
-            'te_ss': []
-        }
+        self.control_points = GeometryStore(('le', 'ps', 'ss', 'te', 'le_ps', 'te_ps', 'le_ss', 'te_ss'))
 
-        self.uv_grid = {
-            'le': [],
-            'ps': [],
-            'ss': [],
-            'te': []
-        }
+        self.uv_grid = GeometryStore(('le', 'ps', 'ss', 'te'))
 
         self.surfaces = {
             'le': [],
@@ -84,16 +71,7 @@ class Segment:
             'te': []
         }
 
-        self.geom = {
-            'le': [],
-            'ps': [],
-            'ss': [],
-            'te': [],
-            'le_ps': [],
-            'te_ps': [],
-            'le_ss': [],
-            'te_ss': []
-        }
+        self.geom = GeometryStore(('le', 'ps', 'ss', 'te', 'le_ps', 'te_ps', 'le_ss', 'te_ss'))
 
     def move(self, cmp_X:float, cmp_Y:float, cmp_Z:float, wng_X:float, wng_Y:float, wng_Z:float, seg_X:float, seg_Y:float, seg_Z:float):
 
@@ -119,15 +97,15 @@ class Segment:
 
         print(f"> Scaling SEGMENT geometry by {scale}...")
 
-        tmp_le = np.array([[scale], [scale], [1]]) * np.array(self.geom['le'])
-        tmp_ps = np.array([[scale], [scale], [1]]) * np.array(self.geom['ps'])
-        tmp_ss = np.array([[scale], [scale], [1]]) * np.array(self.geom['ss'])
-        tmp_te = np.array([[scale], [scale], [1]]) * np.array(self.geom['te'])
+        tmp_le = np.array([[scale], [scale], [1]]) * np.asarray(self.geom['le'])
+        tmp_ps = np.array([[scale], [scale], [1]]) * np.asarray(self.geom['ps'])
+        tmp_ss = np.array([[scale], [scale], [1]]) * np.asarray(self.geom['ss'])
+        tmp_te = np.array([[scale], [scale], [1]]) * np.asarray(self.geom['te'])
 
-        tmp_c_le = np.array([[scale], [scale], [1]]) * np.array(self.control_points['le'])
-        tmp_c_ps = np.array([[scale], [scale], [1]]) * np.array(self.control_points['ps'])
-        tmp_c_ss = np.array([[scale], [scale], [1]]) * np.array(self.control_points['ss'])
-        tmp_c_te = np.array([[scale], [scale], [1]]) * np.array(self.control_points['te'])
+        tmp_c_le = np.array([[scale], [scale], [1]]) * np.asarray(self.control_points['le'])
+        tmp_c_ps = np.array([[scale], [scale], [1]]) * np.asarray(self.control_points['ps'])
+        tmp_c_ss = np.array([[scale], [scale], [1]]) * np.asarray(self.control_points['ss'])
+        tmp_c_te = np.array([[scale], [scale], [1]]) * np.asarray(self.control_points['te'])
 
         return tmp_le, tmp_ps, tmp_ss, tmp_te, tmp_c_le, tmp_c_ps, tmp_c_ss, tmp_c_te
 
@@ -163,26 +141,10 @@ class Segment:
 
         print("Updating SEGMENT geometry...")
 
-        self.control_points['le'] = self.airfoil.constr['le']
-        control_points_Z = [self.params['origin_Z']] * len(self.airfoil.constr['le'][0])
-        self.control_points['le'] = np.vstack([self.control_points['le'], control_points_Z])
+        # Lift the airfoil control polygons to the segment plane, written to the store in one go
+        self.control_points.update({key: np.vstack([self.airfoil.constr[key], np.full(len(self.airfoil.constr[key][0]), self.params['origin_Z'])]) for key in objects2D.PARTS})
 
-        self.control_points['ps'] = self.airfoil.constr['ps']
-        control_points_Z = [self.params['origin_Z']] * len(self.airfoil.constr['ps'][0])
-        self.control_points['ps'] = np.vstack([self.control_points['ps'], control_points_Z])
-
-        self.control_points['ss'] = self.airfoil.constr['ss']
-        control_points_Z = [self.params['origin_Z']] * len(self.airfoil.constr['ss'][0])
-        self.control_points['ss'] = np.vstack([self.control_points['ss'], control_points_Z])
-
-        self.control_points['te'] = self.airfoil.constr['te']
-        control_points_Z = [self.params['origin_Z']] * len(self.airfoil.constr['te'][0])
-        self.control_points['te'] = np.vstack([self.control_points['te'], control_points_Z])
-
-        self.geom['le'] = CreateBSpline_3D(self.control_points['le'], len(self.airfoil.constr['le'][0])-1)
-        self.geom['ps'] = CreateBSpline_3D(self.control_points['ps'], len(self.airfoil.constr['ps'][0])-1)
-        self.geom['ss'] = CreateBSpline_3D(self.control_points['ss'], len(self.airfoil.constr['ss'][0])-1)
-        self.geom['te'] = CreateBSpline_3D(self.control_points['te'], len(self.airfoil.constr['te'][0])-1)
+        self.geom.update({key: CreateBSpline_3D(self.control_points[key], len(self.airfoil.constr[key][0])-1, scale=self.airfoil.params['chord']) for key in objects2D.PARTS})
 
         self.transform(grandparent_index, parent_index, item_index)
 
@@ -191,6 +153,11 @@ class Segment:
         #print(self.geom['ss'])
         #print(self.geom['te'])
 
+    def store_transformed(self, transformed):
+        """Write the (geom le/ps/ss/te, control points le/ps/ss/te) tuple of move/scale/rotate back in place."""
+        self.geom.update(zip(objects2D.PARTS, transformed[:4]))
+        self.control_points.update(zip(objects2D.PARTS, transformed[4:]))
+
     def transform(self, grandparent_index, parent_index, item_index):
 
         cmp_X = globals.PROJECT.project_components[grandparent_index].params['origin_X']
@@ -209,11 +176,11 @@ class Segment:
 
         print("Transforming SEGMENT geometry...")
         print(".")
-        self.geom['le'], self.geom['ps'], self.geom['ss'], self.geom['te'], self.control_points['le'], self.control_points['ps'], self.control_points['ss'], self.control_points['te'] = self.scale(scale)
+        self.store_transformed(self.scale(scale))
         print(".")
-        self.geom['le'], self.geom['ps'], self.geom['ss'], self.geom['te'], self.control_points['le'], self.control_points['ps'], self.control_points['ss'], self.control_points['te'] = self.move(cmp_X, cmp_Y, cmp_Z, wng_X, wng_Y, wng_Z, seg_X, seg_Y, seg_Z)
+        self.store_transformed(self.move(cmp_X, cmp_Y, cmp_Z, wng_X, wng_Y, wng_Z, seg_X, seg_Y, seg_Z))
         print(".")
-        self.geom['le'], self.geom['ps'], self.geom['ss'], self.geom['te'], self.control_points['le'], self.control_points['ps'], self.control_points['ss'], self.control_points['te'] = self.rotate(incidence, (wng_X, wng_Y))
+        self.store_transformed(self.rotate(incidence, (wng_X, wng_Y)))
         print(".")
         print("Done!")
 
@@ -269,15 +236,15 @@ class Wing:
 
         print(f"> Scaling WING geometry by {scale}...")
 
-        tmp_le = scale * np.array(self.geom['le'])
-        tmp_ps = scale * np.array(self.geom['ps'])
-        tmp_ss = scale * np.array(self.geom['ss'])
-        tmp_te = scale * np.array(self.geom['te'])
+        tmp_le = scale * np.asarray(self.geom['le'])
+        tmp_ps = scale * np.asarray(self.geom['ps'])
+        tmp_ss = scale * np.asarray(self.geom['ss'])
+        tmp_te = scale * np.asarray(self.geom['te'])
 
-        tmp_c_le = scale * np.array(self.control_points['le'])
-        tmp_c_ps = scale * np.array(self.control_points['ps'])
-        tmp_c_ss = scale * np.array(self.control_points['ss'])
-        tmp_c_te = scale * np.array(self.control_points['te'])
+        tmp_c_le = scale * np.asarray(self.control_points['le'])
+        tmp_c_ps = scale * np.asarray(self.control_points['ps'])
+        tmp_c_ss = scale * np.asarray(self.control_points['ss'])
+        tmp_c_te = scale * np.asarray(self.control_points['te'])
 
         return tmp_le, tmp_ps, tmp_ss, tmp_te, tmp_c_le, tmp_c_ps, tmp_c_ss, tmp_c_te
 
@@ -338,17 +305,17 @@ class Wing:
         if len(self.segments) > 1:
             for i in range(len(self.segments)-1):
                 
-                parent_le_ps_seg_anchor = np.array(self.segments[i].control_points['ps'])[:,0] #Coordinates of anchor of le and ps -> list: [X,Y,Z]
-                child_le_ps_seg_anchor = np.array(self.segments[i+1].control_points['ps'])[:,0]
+                parent_le_ps_seg_anchor = self.segments[i].control_points['ps'][:,0] #Coordinates of anchor of le and ps -> list: [X,Y,Z]
+                child_le_ps_seg_anchor = self.segments[i+1].control_points['ps'][:,0]
 
-                parent_te_ps_seg_anchor = np.array(self.segments[i].control_points['ps'])[:,-1]
-                child_te_ps_seg_anchor = np.array(self.segments[i+1].control_points['ps'])[:,-1]
+                parent_te_ps_seg_anchor = self.segments[i].control_points['ps'][:,-1]
+                child_te_ps_seg_anchor = self.segments[i+1].control_points['ps'][:,-1]
 
-                parent_le_ss_seg_anchor = np.array(self.segments[i].control_points['ss'])[:,0]
-                child_le_ss_seg_anchor = np.array(self.segments[i+1].control_points['ss'])[:,0]
+                parent_le_ss_seg_anchor = self.segments[i].control_points['ss'][:,0]
+                child_le_ss_seg_anchor = self.segments[i+1].control_points['ss'][:,0]
 
-                parent_te_ss_seg_anchor = np.array(self.segments[i].control_points['ss'])[:,-1]
-                child_te_ss_seg_anchor = np.array(self.segments[i+1].control_points['ss'])[:,-1]
+                parent_te_ss_seg_anchor = self.segments[i].control_points['ss'][:,-1]
+                child_te_ss_seg_anchor = self.segments[i+1].control_points['ss'][:,-1]
 
                 if self.segments[i].anchor == 'G0' and self.segments[i+1].anchor == 'G0':
 
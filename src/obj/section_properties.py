@@ -0,0 +1,177 @@
+'''
+
+Copyright (C) 2025 Jakub Kamyk
+
+This file is part of DAEDALUS.
+
+DAEDALUS is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+DAEDALUS is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import logging
+import numpy as np
+
+from src.obj.airfoil_batch import construct_many
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATIONS = 101
+
+# Airfoils per vectorized block in batch mode, keeps the (N, stations, edges) crossing arrays small
+BATCH_CHUNK = 256
+
+# Cosine spaced chord stations of the thickness and camber descriptor sections are compared by
+DESCRIPTOR_STATIONS = 24
+
+def outline_from_geom(geom):
+    """
+    Join the sampled pieces into one closed outline: le (ss -> ps), ps (LE -> TE), te and ss reversed.
+
+    geom: dict of 'le', 'ps', 'ss', 'te' arrays shaped (2, M) for one airfoil or (N, 2, M) for a batch.
+    Returns an (N, P, 2) array of outline points.
+    """
+    pieces = [np.asarray(geom['le']), np.asarray(geom['ps']), np.asarray(geom['te'])[..., ::-1], np.asarray(geom['ss'])[..., ::-1]]
+    outline = np.concatenate([piece.reshape((-1,) + piece.shape[-2:]) for piece in pieces], axis=-1)
+    return np.swapaxes(outline, 1, 2)
+
+def polygon_properties(outline):
+    """Area, centroid and centroidal second moments (Ixx, Iyy, Ixy) of closed (N, P, 2) outlines."""
+    x0, y0 = outline[..., 0], outline[..., 1]
+    x1, y1 = np.roll(x0, -1, axis=-1), np.roll(y0, -1, axis=-1)
+    cross = x0 * y1 - x1 * y0
+
+    area = cross.sum(axis=-1) / 2
+    # Outline direction depends on the params, normalize to counter-clockwise
+    sign = np.where(area < 0, -1.0, 1.0)
+    area = area * sign
+    cross = cross * sign[:, None]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cx = ((x0 + x1) * cross).sum(axis=-1) / (6 * area)
+        cy = ((y0 + y1) * cross).sum(axis=-1) / (6 * area)
+    ixx = ((y0**2 + y0 * y1 + y1**2) * cross).sum(axis=-1) / 12 - area * cy**2
+    iyy = ((x0**2 + x0 * x1 + x1**2) * cross).sum(axis=-1) / 12 - area * cx**2
+    ixy = ((x0 * y1 + 2 * x0 * y0 + 2 * x1 * y1 + x1 * y0) * cross).sum(axis=-1) / 24 - area * cx * cy
+
+    return {'area': area, 'centroid': np.stack([cx, cy], axis=-1), 'Ixx': ixx, 'Iyy': iyy, 'Ixy': ixy}
+
+def thickness_camber(outline, n_stations=DEFAULT_STATIONS):
+    """
+    Thickness distribution and camber line of (N, P, 2) outlines.
+
+    Every outline is cut with vertical lines at cosine-spaced stations between its leading (min x) and
+    trailing (max x) points; the highest and lowest crossings give the upper and lower surface there.
+    Camber is measured from the chord line joining the leading and trailing points.
+    """
+    xs, ys = outline[..., 0], outline[..., 1]
+    i_le = np.argmin(xs, axis=-1)
+    i_te = np.argmax(xs, axis=-1)
+    rows = np.arange(len(outline))
+    le = np.stack([xs[rows, i_le], ys[rows, i_le]], axis=-1)
+    te = np.stack([xs[rows, i_te], ys[rows, i_te]], axis=-1)
+
+    t = (1 - np.cos(np.linspace(0, np.pi, n_stations))) / 2
+    stations = le[:, :1] + (te[:, :1] - le[:, :1]) * t  # (N, S)
+    stations[:, -1] = te[:, 0]
+
+    # Crossings of every station with every outline edge, (N, S, P)
+    x0, y0 = xs[:, None, :], ys[:, None, :]
+    x1, y1 = np.roll(x0, -1, axis=-1), np.roll(y0, -1, axis=-1)
+    xq = stations[..., None]
+    dx = x1 - x0
+    crosses = ((x0 - xq) * (x1 - xq) <= 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        y = np.where(dx != 0, y0 + (xq - x0) * (y1 - y0) / np.where(dx != 0, dx, 1), np.maximum(y0, y1))
+    upper = np.where(crosses, y, -np.inf).max(axis=-1)
+    y = np.where(dx != 0, y, np.minimum(y0, y1))
+    lower = np.where(crosses, y, np.inf).min(axis=-1)
+
+    thickness = upper - lower
+    mean = (upper + lower) / 2
+    chord_y = le[:, 1:] + (te[:, 1:] - le[:, 1:]) * t
+    camber = mean - chord_y
+
+    chord = np.hypot(*(te - le).T)
+    i_t = np.argmax(thickness, axis=-1)
+    i_c = np.argmax(np.abs(camber), axis=-1)
+
+    return {
+        'thickness': np.stack([stations, thickness], axis=1),
+        'camber_line': np.stack([stations, mean], axis=1),
+        'max_thickness': thickness[rows, i_t],
+        'max_thickness_x': t[i_t],
+        'max_camber': camber[rows, i_c],
+        'max_camber_x': t[i_c],
+        'chord_length': chord
+    }
+
+def shape_descriptors(outline, n_stations=DESCRIPTOR_STATIONS):
+    """
+    Size independent shapes of (N, P, 2) outlines: thickness and camber per chord at cosine spaced stations.
+
+    Camber is taken from the line joining the mean line ends, a section rotated by a small angle keeps its
+    descriptor. Returns (descriptors (N, 2*n_stations), chord lengths (N,)).
+    """
+    props = thickness_camber(np.asarray(outline, dtype=float), n_stations)
+    chord = props['chord_length']
+    thickness = props['thickness'][:, 1]
+    mean = props['camber_line'][:, 1]
+    camber = mean - (mean[:, :1] + (mean[:, -1:] - mean[:, :1]) * np.linspace(0, 1, n_stations))
+    return np.hstack([thickness, camber]) / chord[:, None], chord
+
+def outline_properties(outline, n_stations=DEFAULT_STATIONS):
+    """All section properties of (N, P, 2) outlines, as a dict of arrays with a leading N axis."""
+    props = polygon_properties(outline)
+    props.update(thickness_camber(outline, n_stations))
+    return props
+
+def airfoil_properties(airfoil, n_stations=DEFAULT_STATIONS):
+    """
+    Section properties of a single Airfoil from its current sampled geometry.
+
+    Values are plain floats / (2, n_stations) arrays; max_thickness_x and max_camber_x are fractions of chord.
+    Prefer Airfoil.section_properties(), which caches the result against the airfoil version.
+    """
+    props = outline_properties(outline_from_geom(airfoil.geom), n_stations)
+    return {key: value[0] if np.ndim(value[0]) else float(value[0]) for key, value in props.items()}
+
+def batch_properties(params_array, resolution=None, n_stations=DEFAULT_STATIONS):
+    """
+    Section properties of N airfoils straight from an (N, 19) params array, without building Airfoil objects.
+
+    Returns a dict of arrays with a leading N axis, e.g. props['max_thickness'] of shape (N,).
+    """
+    params_array = np.atleast_2d(np.asarray(params_array, dtype=float))
+    blocks = []
+    for start in range(0, len(params_array), BATCH_CHUNK):
+        geom, _ = construct_many(params_array[start:start + BATCH_CHUNK], resolution)
+        blocks.append(outline_properties(outline_from_geom(geom), n_stations))
+
+    if not blocks:
+        return {}
+    logger.debug(f"Computed section properties of {len(params_array)} airfoils")
+    return {key: np.concatenate([block[key] for block in blocks]) for key in blocks[0]}
+
+def filter_by(props, **ranges):
+    """
+    Boolean mask over a batch_properties() result, e.g. filter_by(props, max_thickness=(0.08, 0.12)).
+
+    Each keyword names a scalar property and gives a (low, high) range, None leaves that side open.
+    """
+    mask = np.ones(len(next(iter(props.values()))), dtype=bool)
+    for key, (low, high) in ranges.items():
+        if low is not None:
+            mask &= props[key] >= low
+        if high is not None:
+            mask &= props[key] <= high
+    return mask
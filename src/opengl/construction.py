@@ -39,7 +39,7 @@ def draw_cp_net(object, zoom):
 
     for i in range(len(object.segments)):
         for key in object.segments[i].control_points:
-            points = np.array(object.segments[i].control_points[key]).T
+            points = np.asarray(object.segments[i].control_points[key]).T
             logger.debug(f"{key}: ", points)
             for point in points:
                 glVertex3f(point[0], point[1], point[2])
@@ -48,7 +48,7 @@ def draw_cp_net(object, zoom):
     # Now draw dashed lines
     for i in range(len(object.segments)):
         for key in object.segments[i].control_points:
-            points = np.array(object.segments[i].control_points[key]).T
+            points = np.asarray(object.segments[i].control_points[key]).T
             logger.debug(f"{key}: ", points)
             z = object.segments[i].params['origin_Z'] if key in ['le', 'ps', 'ss', 'te'] else None
             for j in range(len(points) - 1):
@@ -61,7 +61,7 @@ def draw_cp_net(object, zoom):
                 draw_dashed_line(p1, p2, zoom=zoom)
 
 def draw_cp_grid(control_points, point_size=8):
-    control_points = np.array(control_points)  # Convert to NumPy array
+    control_points = np.asarray(control_points)  # Convert to NumPy array (no copy for stored grids)
 
     glPointSize(point_size)
     glColor3f(1.0, 1.0, 0.0)  # yellow
@@ -150,7 +150,7 @@ def draw_wireframe(self, component_idx, wing_idx, segment_idx):
             # Draw edges connecting front and back faces
             glColor3f(color[key][0], color[key][1], color[key][2])
             glBegin(GL_LINES)
-            for i in range(len(le[0])-1):
+            for i in range(len(segment.geom[key][0])-1):
                 glVertex3f(segment.geom[key][0][i], segment.geom[key][1][i], segment.geom[key][2][i])
                 glVertex3f(segment.geom[key][0][i+1], segment.geom[key][1][i+1], segment.geom[key][2][i+1])
             glEnd()
@@ -149,6 +149,27 @@ def draw_object_from_file(filepath, extrusion=1.0):
         glVertex3f(*back_face[i])
     glEnd()
 
+def _resample_piece(points, n_points):
+    """(D, n_points) samples of a (D, M) sampled curve, equally spaced in normalized arc length."""
+    points = np.asarray(points, dtype=float)
+    s = np.concatenate([[0.0], np.cumsum(np.linalg.norm(np.diff(points, axis=1), axis=0))])
+    s = s / s[-1] if s[-1] > 0 else np.linspace(0, 1, points.shape[1])
+    t = np.linspace(0, 1, n_points)
+    return np.vstack([np.interp(t, s, row) for row in points])
+
+def _matched_pieces(parent, child):
+    """
+    Parent and child samples of one piece with the same point count.
+
+    With adaptive sampling every section picks its own count; the one with fewer points is resampled.
+    """
+    n_parent, n_child = np.shape(parent)[1], np.shape(child)[1]
+    if n_parent == n_child:
+        return parent, child
+    if n_parent < n_child:
+        return _resample_piece(parent, n_child), child
+    return parent, _resample_piece(child, n_parent)
+
 def draw_wing(self, wing, no_of_segments):
     """Draw a wing using coordinates from a file, extruded along the z-axis."""
     logger.info('Drawing wing')
@@ -158,56 +179,23 @@ def draw_wing(self, wing, no_of_segments):
         segment_parent = wing.segments[seg_idx]
         segment_child = wing.segments[seg_idx + 1]
 
-        ps_parent = segment_parent.geom['ps']  # list of (x, y)
-        ps_child = segment_child.geom['ps']  # list of (x, y)
-
-        ss_parent = segment_parent.geom['ss']  # list of (x, y)
-        ss_child = segment_child.geom['ss']  # list of (x, y)
-
-        le_parent = segment_parent.geom['le']  # list of (x, y)
-        le_child = segment_child.geom['le']  # list of (x, y)
-
-        te_parent = segment_parent.geom['te']  # list of (x, y)
-        te_child = segment_child.geom['te']  # list of (x, y)
-
         z_parent = segment_parent.params['origin_Z']
         z_child = segment_child.params['origin_Z']
 
-        if ps_parent is None or ps_child is None or len(ps_parent) != len(ps_child):
+        if segment_parent.geom['ps'] is None or segment_child.geom['ps'] is None:
             logger.error(f"Invalid airfoil data for segments {seg_idx} and {seg_idx + 1}:")
             continue
 
-        glBegin(GL_QUADS)
-        for i in range(len(ps_parent[0]) - 1):
-            glVertex3f(ps_parent[0][i],     ps_parent[1][i],     z_parent)
-            glVertex3f(ps_parent[0][i+1],   ps_parent[1][i+1],   z_parent)
-            glVertex3f(ps_child[0][i+1],   ps_child[1][i+1],   z_child)
-            glVertex3f(ps_child[0][i],     ps_child[1][i],     z_child)
-        glEnd()
-
-        glBegin(GL_QUADS)
-        for i in range(len(ss_parent[0]) - 1):
-            glVertex3f(ss_parent[0][i],     ss_parent[1][i],     z_parent)
-            glVertex3f(ss_parent[0][i+1],   ss_parent[1][i+1],   z_parent)
-            glVertex3f(ss_child[0][i+1],   ss_child[1][i+1],   z_child)
-            glVertex3f(ss_child[0][i],     ss_child[1][i],     z_child)
-        glEnd()
-
-        glBegin(GL_QUADS)
-        for i in range(len(le_parent[0]) - 1):
-            glVertex3f(le_parent[0][i],     le_parent[1][i],     z_parent)
-            glVertex3f(le_parent[0][i+1],   le_parent[1][i+1],   z_parent)
-            glVertex3f(le_child[0][i+1],   le_child[1][i+1],   z_child)
-            glVertex3f(le_child[0][i],     le_child[1][i],     z_child)
-        glEnd()
-
-        glBegin(GL_QUADS)
-        for i in range(len(te_parent[0]) - 1):
-            glVertex3f(te_parent[0][i],     te_parent[1][i],     z_parent)
-            glVertex3f(te_parent[0][i+1],   te_parent[1][i+1],   z_parent)
-            glVertex3f(te_child[0][i+1],   te_child[1][i+1],   z_child)
-            glVertex3f(te_child[0][i],     te_child[1][i],     z_child)
-        glEnd()
+        for key in ('ps', 'ss', 'le', 'te'):
+            parent, child = _matched_pieces(segment_parent.geom[key], segment_child.geom[key])  # (x, y) rows
+
+            glBegin(GL_QUADS)
+            for i in range(len(parent[0]) - 1):
+                glVertex3f(parent[0][i],     parent[1][i],     z_parent)
+                glVertex3f(parent[0][i+1],   parent[1][i+1],   z_parent)
+                glVertex3f(child[0][i+1],   child[1][i+1],   z_child)
+                glVertex3f(child[0][i],     child[1][i],     z_child)
+            glEnd()
 
 def draw_b_spline_surf(segment):
     """
@@ -259,7 +259,7 @@ class ViewportOpenGL(QGLWidget):
             ss_fwd_angle, ss_rwd_angle, ss_fwd_accel, ss_rwd_accel
         '''
 
-        # Extract parameters
+        # Cheap when nothing changed - geometry is only rebuilt on a parameter/resolution change
         Current_Airfoil.update()
         glDisable(GL_DEPTH_TEST)
 
@@ -367,7 +367,7 @@ class ViewportOpenGL(QGLWidget):
         for key in airfoil.constr:
             glColor3f(color[key][0], color[key][1], color[key][2])
             glBegin(GL_POINTS)
-            points = np.array(airfoil.constr[key]).T
+            points = np.asarray(airfoil.constr[key]).T
             #print(f"{key}: ", points)
             for point in points:
                 glVertex3f(point[0], point[1], 0.0)
@@ -378,7 +378,7 @@ class ViewportOpenGL(QGLWidget):
         from numpy import array, linalg
 
         for key in airfoil.constr:
-            points = np.array(airfoil.constr[key]).T
+            points = np.asarray(airfoil.constr[key]).T
             z = 0 if key in ['le', 'ps', 'ss', 'te'] else None
             for j in range(len(points) - 1):
                 p1 = points[j]
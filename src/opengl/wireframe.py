@@ -57,7 +57,7 @@ def draw_airfoil_wireframe(self, component_idx, wing_idx, segment_idx):
             # Draw edges connecting front and back faces
             glColor3f(color[key][0], color[key][1], color[key][2])
             glBegin(GL_LINES)
-            for i in range(len(le[0])-1):
+            for i in range(len(segment.geom[key][0])-1):
                 glVertex3f(segment.geom[key][0][i], segment.geom[key][1][i], segment.geom[key][2][i])
                 glVertex3f(segment.geom[key][0][i+1], segment.geom[key][1][i+1], segment.geom[key][2][i+1])
             glEnd()
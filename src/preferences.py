@@ -98,6 +98,10 @@ class PreferencesWindow(QDialog):
 
         self.general_performance_slider.valueChanged.connect(self.on_performance_changed)
 
+        self.general_adaptive_sampling = QCheckBox("Adaptive curve sampling")
+        self.general_adaptive_sampling.setToolTip("Place more points on strongly curved regions and fewer on flat ones.")
+        self.general_adaptive_sampling.setChecked(DAEDALUS.adaptive_sampling())
+
         self.general_beta_features = QCheckBox("Beta Features")
         self.general_beta_features.setChecked(DAEDALUS.preferences['general']['beta_features'])
 
@@ -116,6 +120,7 @@ class PreferencesWindow(QDialog):
         layout.addLayout(length_layout)
         layout.addLayout(angle_layout)
         layout.addLayout(perf_layout)
+        layout.addWidget(self.general_adaptive_sampling)
         layout.addWidget(self.general_beta_features)
         layout.addStretch()
         self.general_tab.setLayout(layout)
@@ -201,6 +206,7 @@ class PreferencesWindow(QDialog):
             DAEDALUS.preferences['general']["units"]["angle"] = 'rad'
 
         DAEDALUS.preferences['general']["performance"] = self.general_performance_slider.value()
+        DAEDALUS.preferences['general']["adaptive_sampling"] = self.general_adaptive_sampling.isChecked()
         DAEDALUS.preferences['general']["beta_features"] = self.general_beta_features.isChecked()
 
         # --- AIRFOIL DESIGNER TAB --- #
@@ -229,6 +235,7 @@ class PreferencesWindow(QDialog):
                 "angle": DAEDALUS.preferences['general']['units'].get("angle", "rad"),
             },
             "performance": self.general_performance_slider.value(),
+            "adaptive_sampling": DAEDALUS.adaptive_sampling(),
             "beta_features": DAEDALUS.preferences['general'].get("beta_features", False),
         }
 
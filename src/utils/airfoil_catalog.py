@@ -0,0 +1,374 @@
+'''
+
+Copyright (C) 2025 Jakub Kamyk
+
+This file is part of DAEDALUS.
+
+DAEDALUS is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+DAEDALUS is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import argparse
+import glob
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.utils.selig import cosine_resample, parse_coordinates
+
+logger = logging.getLogger(__name__)
+
+CATALOG_DIR = os.path.join(os.path.expanduser("~"), ".daedalus", "catalogs")
+
+CATALOG_VERSION = 3
+
+# Points per surface of the fixed-stride shape store, LE and TE shared by both surfaces
+STORE_POINTS_PER_SIDE = 65
+
+LIBRARY_PATTERNS = ('*.txt', '*.dat')
+
+# Per section columns of the catalog file, besides the coordinate buffer
+SCALAR_FIELDS = ('size', 'mtime', 'n_upper', 'n_lower', 'le_x', 'le_y', 'chord',
+                 'max_thickness', 'max_thickness_x', 'max_camber', 'max_camber_x')
+TEXT_FIELDS = ('file', 'name', 'hash')
+
+_lock = threading.Lock()
+
+# Memory maps opened by this process, keyed by path; workers reading the same store share its pages
+_maps = {}
+
+def open_store(path):
+    """Read-only memory map of a catalog array file, opened once per process."""
+    store = _maps.get(path)
+    if store is None:
+        store = np.load(path, mmap_mode='r')
+        _maps[path] = store
+    return store
+
+def reference_from_store(raw_path, start, n_upper, n_lower, name):
+    """
+    Reference airfoil read straight from the raw coordinate store of a catalog, see AirfoilCatalog.store_source().
+
+    Meant for worker processes: only the pages of this section are touched and they are shared with every
+    other process mapping the same store.
+    """
+    import src.obj.objects2D as objects2D
+
+    points = open_store(raw_path)[:, start:start + n_upper + n_lower]
+    reference = objects2D.Airfoil_selig_format()
+    reference.top_curve = np.array(points[:, :n_upper])
+    reference.dwn_curve = np.array(points[:, n_upper:])
+    reference.infos['name'] = name
+    return reference
+
+def _write_array(path, array):
+    tmp_path = path + '.tmp.npy'
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+def _index_entry(file_name, data, stat):
+    """Catalog entry of one coordinate file from its bytes."""
+    from src.obj.section_properties import thickness_camber
+
+    name, upper, lower = parse_coordinates(data.decode('utf-8', errors='replace'), file_name)
+    points = np.hstack((upper, lower))
+    i_le = int(np.argmin(points[0]))
+    le_x, le_y = points[:, i_le]
+    chord = float(points[0].max() - le_x)
+
+    outline = (np.hstack((upper[:, ::-1], lower)).T[None] - (le_x, le_y)) / chord
+    props = thickness_camber(outline)
+    return {
+        'file': os.path.basename(file_name),
+        'name': name or os.path.splitext(os.path.basename(file_name))[0],
+        'hash': hashlib.sha1(data).hexdigest(),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns,
+        'n_upper': upper.shape[1],
+        'n_lower': lower.shape[1],
+        'le_x': float(le_x),
+        'le_y': float(le_y),
+        'chord': chord,
+        'max_thickness': float(props['max_thickness'][0]),
+        'max_thickness_x': float(props['max_thickness_x'][0]),
+        'max_camber': float(props['max_camber'][0]),
+        'max_camber_x': float(props['max_camber_x'][0]),
+        'upper': upper,
+        'lower': lower,
+        'shape': cosine_resample(outline, STORE_POINTS_PER_SIDE)[0].astype(np.float32),
+    }
+
+class AirfoilCatalog:
+    """
+    Binary index of a directory of Selig/Lednicer coordinate files.
+
+    Every section is kept with its coordinates, the leading edge and chord that normalize them, its thickness
+    and camber and the hash of its source file. update() re-parses only the files whose size or modification
+    time changed (and whose content hash really differs), after that a lookup is a dictionary hit.
+
+    On disk, under CATALOG_DIR, the metadata and the offset table are a small .npz file; the coordinates are
+    two memory-mapped arrays. <digest>.<generation>.raw.npy holds the coordinates of all sections one after the
+    other, <digest>.<generation>.shapes.npy the normalized outlines resampled to a fixed stride, one row per
+    section in files() order. Neither is read into memory, pages are only loaded when a section is used.
+
+    Every save() writes a new generation of the arrays instead of replacing the mapped files, Windows refuses to
+    replace or delete a file while it is mapped. Older generations are deleted once nothing maps them anymore.
+    """
+    def __init__(self, directory, path=None, patterns=LIBRARY_PATTERNS):
+        self.directory = os.path.abspath(directory)
+        digest = hashlib.sha1(self.directory.encode()).hexdigest()[:16]
+        self.path = path or os.path.join(CATALOG_DIR, f"{digest}.npz")
+        self.raw_path = self.shapes_path = None
+        self.patterns = patterns
+        self.entries = {}
+        self._shapes = None
+        self.load()
+
+    def _array_paths(self, generation):
+        base = os.path.splitext(self.path)[0]
+        return f"{base}.{generation}.raw.npy", f"{base}.{generation}.shapes.npy"
+
+    def load(self):
+        self.entries.clear()
+        self._shapes = None
+        self.raw_path = self.shapes_path = None
+        try:
+            with np.load(self.path) as data:
+                if int(data['version']) != CATALOG_VERSION:
+                    return
+                columns = {field: data[f'column_{field}'] for field in SCALAR_FIELDS + TEXT_FIELDS}
+                offsets = data['offsets']
+                raw_path, shapes_path = self._array_paths(str(data['generation']))
+            coordinates = np.load(raw_path, mmap_mode='r')
+            shapes = np.load(shapes_path, mmap_mode='r')
+        except FileNotFoundError:
+            return
+        except (OSError, KeyError, ValueError):
+            logger.warning(f"Airfoil catalog {self.path} is unreadable, rebuilding it.")
+            return
+        if coordinates.shape[1] != offsets[-1] or len(shapes) != len(offsets) - 1:
+            logger.warning(f"Airfoil catalog {self.path} is incomplete, rebuilding it.")
+            return
+
+        for i in range(len(offsets) - 1):
+            entry = {field: columns[field][i].item() for field in SCALAR_FIELDS}
+            entry.update({field: str(columns[field][i]) for field in TEXT_FIELDS})
+            entry['row'] = i
+            entry['start'] = int(offsets[i])
+            points = coordinates[:, offsets[i]:offsets[i + 1]]
+            entry['upper'] = points[:, :entry['n_upper']]
+            entry['lower'] = points[:, entry['n_upper']:]
+            self.entries[entry['file']] = entry
+        self._shapes = shapes
+        self.raw_path, self.shapes_path = raw_path, shapes_path
+
+    def _shape(self, entry):
+        return entry['shape'] if 'shape' in entry else self._shapes[entry['row']]
+
+    def save(self):
+        """Rewrite the catalog files and map them again. The metadata goes last, it is what load() trusts."""
+        entries = [self.entries[file] for file in sorted(self.entries)]
+        offsets = np.cumsum([0] + [entry['n_upper'] + entry['n_lower'] for entry in entries])
+        coordinates = np.hstack([np.hstack((entry['upper'], entry['lower'])) for entry in entries]) if entries else np.empty((2, 0))
+        shapes = np.stack([self._shape(entry) for entry in entries]) if entries else \
+            np.empty((0, 2 * STORE_POINTS_PER_SIDE - 1, 2), dtype=np.float32)
+        # Prefixed, 'file' would clash with the first argument of np.savez
+        columns = {f'column_{field}': np.array([entry[field] for entry in entries]) for field in SCALAR_FIELDS}
+        columns.update({f'column_{field}': np.array([entry[field] for entry in entries], dtype=str) for field in TEXT_FIELDS})
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp.npz'
+        generation = time.time_ns()
+        raw_path, shapes_path = self._array_paths(f"{generation:x}")
+        with _lock:
+            _write_array(raw_path, coordinates)
+            _write_array(shapes_path, shapes)
+            np.savez(tmp_path, version=CATALOG_VERSION, directory=self.directory, generation=f"{generation:x}", offsets=offsets, **columns)
+            os.replace(tmp_path, self.path)
+        self.load()
+        self._remove_old_generations(generation)
+
+    def _remove_old_generations(self, generation):
+        """Delete the array files of earlier saves; a file still mapped somewhere stays until a later save."""
+        base = os.path.splitext(self.path)[0]
+        for path in glob.glob(f"{glob.escape(base)}.*raw.npy") + glob.glob(f"{glob.escape(base)}.*shapes.npy"):
+            label = path[len(base) + 1:].split('.')[0]
+            try:
+                # Catalogs of version 2 and older kept unversioned <digest>.raw.npy and <digest>.shapes.npy
+                other = -1 if label in ('raw', 'shapes') else int(label, 16)
+            except ValueError:
+                continue
+            # Newer generations may belong to a save of another process
+            if other >= generation:
+                continue
+            _maps.pop(path, None)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _library_files(self):
+        return sorted({os.path.basename(path) for pattern in self.patterns for path in glob.glob(os.path.join(self.directory, pattern))})
+
+    def _refresh(self, file):
+        """Re-index one file if it changed since it was cataloged. Returns True if the entry changed."""
+        path = os.path.join(self.directory, file)
+        stat = os.stat(path)
+        entry = self.entries.get(file)
+        if entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            return False
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        if entry is not None and entry['hash'] == hashlib.sha1(data).hexdigest():
+            # Touched but not changed
+            entry['size'], entry['mtime'] = stat.st_size, stat.st_mtime_ns
+            return True
+        self.entries[file] = _index_entry(path, data, stat)
+        return True
+
+    def update(self):
+        """
+        Bring the catalog in line with the directory, re-indexing new and changed files only.
+
+        Returns (indexed, removed) counts; the catalog file is rewritten if anything changed.
+        """
+        files = self._library_files()
+        indexed = 0
+        for file in files:
+            try:
+                indexed += self._refresh(file)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping {file} in the airfoil catalog: {e}")
+                self.entries.pop(file, None)
+
+        present = set(files)
+        removed = [file for file in self.entries if file not in present]
+        for file in removed:
+            del self.entries[file]
+
+        if indexed or removed:
+            try:
+                self.save()
+            except OSError as e:
+                logger.warning(f"Could not write the airfoil catalog: {e}")
+            logger.info(f"Airfoil catalog of {self.directory}: {indexed} indexed, {len(removed)} removed, {len(self.entries)} total")
+        return indexed, len(removed)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, file):
+        return os.path.basename(file) in self.entries
+
+    def files(self):
+        return sorted(self.entries)
+
+    def row(self, file):
+        """Row of a section in shapes(), None if it was indexed after the catalog was last saved."""
+        return self.entries[os.path.basename(file)].get('row')
+
+    def shapes(self):
+        """
+        (n_sections, 2*STORE_POINTS_PER_SIDE - 1, 2) normalized outlines in files() order, TE -> upper -> LE -> lower -> TE.
+
+        A read-only memory map of the store when the catalog is saved, an in-memory array otherwise.
+        """
+        if self._shapes is not None and all('row' in entry for entry in self.entries.values()):
+            return self._shapes
+        return np.stack([self._shape(self.entries[file]) for file in self.files()])
+
+    def store_source(self, file):
+        """Picklable arguments of reference_from_store() for one section, None if it is not in the saved store."""
+        entry = self.entries[os.path.basename(file)]
+        if 'start' not in entry:
+            return None
+        return self.raw_path, entry['start'], entry['n_upper'], entry['n_lower'], entry['name']
+
+    def metadata(self, file):
+        """Name, point counts, thickness, camber and source hash of one section, without its coordinates."""
+        entry = self.entries[os.path.basename(file)]
+        return {field: entry[field] for field in TEXT_FIELDS + SCALAR_FIELDS}
+
+    def coordinates(self, file, normalized=True):
+        """(upper, lower) [xs, ys] arrays LE -> TE, normalized to a unit chord starting at (0, 0) unless told otherwise."""
+        entry = self.entries[os.path.basename(file)]
+        if not normalized:
+            return entry['upper'], entry['lower']
+        shift = np.array([[entry['le_x']], [entry['le_y']]])
+        return (entry['upper'] - shift) / entry['chord'], (entry['lower'] - shift) / entry['chord']
+
+    def reference(self, file):
+        """
+        Reference airfoil of one library file as loaded by SeligReference, checked against the file on disk.
+
+        Only this file is re-indexed if it changed. Every call returns a new object with its own curves.
+        """
+        import src.obj.objects2D as objects2D
+
+        file = os.path.basename(file)
+        if self._refresh(file):
+            try:
+                self.save()
+            except OSError as e:
+                logger.warning(f"Could not write the airfoil catalog: {e}")
+
+        entry = self.entries[file]
+        reference = objects2D.Airfoil_selig_format()
+        reference.top_curve = np.array(entry['upper'])
+        reference.dwn_curve = np.array(entry['lower'])
+        reference.infos['name'] = entry['name']
+        return reference
+
+# One catalog per library directory and session, and the directories already updated in this session
+_catalogs = {}
+_updated = set()
+
+def get_catalog(directory, update=True):
+    """
+    Catalog of a library directory. With update it is brought in line with the directory the first time it is
+    asked for, without it only the files looked up later are indexed.
+    """
+    directory = os.path.abspath(directory)
+    catalog = _catalogs.get(directory)
+    if catalog is None:
+        catalog = AirfoilCatalog(directory)
+        _catalogs[directory] = catalog
+    if update and directory not in _updated:
+        catalog.update()
+        _updated.add(directory)
+    return catalog
+
+def load_reference(file_name):
+    """
+    Reference airfoil of a coordinate file, through the catalog of its directory. Only that file is indexed,
+    picking a reference from e.g. a downloads folder does not parse every other file next to it.
+    """
+    return get_catalog(os.path.dirname(os.path.abspath(file_name)), update=False).reference(file_name)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or update the airfoil catalog of coordinate file directories")
+    parser.add_argument('directories', nargs='+')
+    args = parser.parse_args(argv)
+    for directory in args.directories:
+        catalog = AirfoilCatalog(directory)
+        indexed, removed = catalog.update()
+        print(f"{directory}: {len(catalog)} sections, {indexed} indexed, {removed} removed -> {catalog.path}")
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    main()
@@ -0,0 +1,201 @@
+'''
+
+Copyright (C) 2025 Jakub Kamyk
+
+This file is part of DAEDALUS.
+
+DAEDALUS is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+DAEDALUS is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import src.globals as globals
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POINTS_PER_SIDE = 81
+
+# Samples per piece of the dense outline the export points are interpolated from
+EXPORT_RESOLUTION = 400
+
+def _numeric_pairs(lines):
+    """Fallback for files with text between the coordinates: keep the lines holding exactly two numbers."""
+    pairs = []
+    for line in lines:
+        fields = line.replace(',', ' ').split()
+        if len(fields) != 2:
+            continue
+        try:
+            pairs.append((float(fields[0]), float(fields[1])))
+        except ValueError:
+            continue
+    return np.array(pairs, dtype=float).reshape(-1, 2)
+
+def read_coordinates(file_name):
+    """
+    Read a Selig or Lednicer coordinate file.
+
+    Selig lists the points TE -> upper -> LE -> lower -> TE and is split at the minimum x point, Lednicer gives
+    the point counts of both surfaces on the second line and lists each surface LE -> TE. Files listing both
+    surfaces LE -> TE without the counts are split where x jumps back to the leading edge. The first line is
+    the airfoil name. Returns (name, upper, lower) with upper and lower as contiguous [xs, ys] arrays, LE -> TE.
+    """
+    with open(file_name, 'r') as file:
+        return parse_coordinates(file.read(), file_name)
+
+def parse_coordinates(text, source="text"):
+    """read_coordinates() on the content of a coordinate file, source only names it in errors."""
+    header, _, body = text.lstrip().partition('\n')
+    name = header.strip()
+    if name.startswith("Name:"):
+        name = name[len("Name:"):].strip()
+    name = " ".join(name.split())
+
+    try:
+        values = np.array(body.replace(',', ' ').split(), dtype=float)
+        if values.size % 2:
+            raise ValueError("odd number of values")
+        points = values.reshape(-1, 2)
+    except ValueError:
+        points = _numeric_pairs(body.splitlines())
+    if len(points) < 3:
+        raise ValueError(f"{source} holds no airfoil coordinates")
+
+    n_upper, n_lower = points[0]
+    if n_upper > 1.5 and n_lower > 1.5 and n_upper == int(n_upper) and n_lower == int(n_lower) \
+            and int(n_upper) + int(n_lower) == len(points) - 1:
+        # Lednicer: both surfaces from the leading edge
+        upper = points[1:1 + int(n_upper)]
+        lower = points[1 + int(n_upper):]
+    else:
+        xs = points[:, 0]
+        if xs[0] - xs.min() < xs.max() - xs[0]:
+            # Starts at the leading edge: Lednicer order without the counts
+            split = int(np.argmin(np.diff(xs))) + 1
+            upper = points[:split]
+            lower = points[split:]
+        else:
+            le = int(np.argmin(xs))
+            upper = points[:le + 1][::-1]
+            lower = points[le:]
+
+    # Some files start with the lower surface
+    if upper[:, 1].mean() < lower[:, 1].mean():
+        upper, lower = lower, upper
+
+    return name, np.ascontiguousarray(upper.T), np.ascontiguousarray(lower.T)
+
+def cosine_resample(outline, points_per_side=DEFAULT_POINTS_PER_SIDE):
+    """
+    Resample closed (N, P, 2) outlines into Selig order with cosine clustering at LE and TE.
+
+    Each surface is split by arc length between the trailing (max x) and leading (min x) points, so the
+    spacing follows the real contour. Returns (N, 2*points_per_side - 1, 2): TE -> upper -> LE -> lower -> TE.
+    """
+    n_airfoils, n_points, _ = outline.shape
+    rows = np.arange(n_airfoils)
+
+    # Start every outline at its trailing edge and close the loop
+    order = (np.argmax(outline[..., 0], axis=-1)[:, None] + np.arange(n_points + 1)) % n_points
+    loop = outline[rows[:, None], order]
+
+    seg = np.hypot(*np.diff(loop, axis=1).transpose(2, 0, 1))
+    s = np.concatenate([np.zeros((n_airfoils, 1)), np.cumsum(seg, axis=1)], axis=1)
+    s_le = s[rows, np.argmin(loop[..., 0], axis=-1)]
+    s_end = s[:, -1]
+
+    t = (1 - np.cos(np.linspace(0, np.pi, points_per_side))) / 2
+    targets = np.concatenate([s_le[:, None] * t, s_le[:, None] + (s_end - s_le)[:, None] * t[1:]], axis=1)
+
+    # One searchsorted for the whole batch: shift every row past the end of the previous one
+    offset = (rows * (s_end.max() + 1))[:, None]
+    idx = np.searchsorted((s + offset).ravel(), (targets + offset).ravel(), side='right').reshape(targets.shape) - 1
+    idx = np.clip(idx - rows[:, None] * (n_points + 1), 0, n_points - 1)
+
+    s0 = np.take_along_axis(s, idx, axis=1)
+    s1 = np.take_along_axis(s, idx + 1, axis=1)
+    w = np.where(s1 > s0, (targets - s0) / np.where(s1 > s0, s1 - s0, 1), 0.0)[..., None]
+    p0 = loop[rows[:, None], idx]
+    p1 = loop[rows[:, None], idx + 1]
+    points = p0 + (p1 - p0) * w
+
+    # Selig lists the upper surface first
+    first_below = points[:, :points_per_side, 1].mean(axis=1) < points[:, points_per_side - 1:, 1].mean(axis=1)
+    points[first_below] = points[first_below, ::-1]
+    return points
+
+def normalize_coordinates(points):
+    """Move the leading edge to (0, 0) and scale the chord to 1, as solvers expect from Selig files."""
+    le = points[np.argmin(points[:, 0])]
+    chord = points[:, 0].max() - le[0]
+    return (points - le) / chord
+
+def write_selig(file_name, name, points, overwrite=True):
+    """Write one (P, 2) coordinate array as a Selig .dat file, without overwrite an existing file raises FileExistsError."""
+    with open(file_name, 'w' if overwrite else 'x') as file:
+        file.write(f"{name}\n")
+        for x, y in points:
+            file.write(f" {x:.7f} {y:.7f}\n")
+
+def _file_name(directory, name, used):
+    """Unique file name for an airfoil, names already in used (lower case stems) get a numbered suffix."""
+    stem = re.sub(r'[^\w\-. ]', '_', name).strip() or 'airfoil'
+    candidate = stem
+    count = 1
+    while candidate.lower() in used:
+        candidate = f"{stem}_{count}"
+        count += 1
+    used.add(candidate.lower())
+    return os.path.join(directory, f"{candidate}.dat")
+
+def export_airfoils_to_selig(airfoils, directory, points_per_side=DEFAULT_POINTS_PER_SIDE, normalize=True, workers=None,
+                             overwrite=False):
+    """
+    Export Airfoil objects as Selig .dat files in directory, constructing and resampling them in one batch.
+
+    A .dat file already in directory is never replaced unless overwrite, the airfoil gets a numbered suffix
+    instead. Returns the list of written file names, in the order of airfoils.
+    """
+    import src.obj.airfoil_batch as airfoil_batch
+    from src.obj.section_properties import outline_from_geom
+
+    airfoils = list(airfoils)
+    if not airfoils:
+        return []
+    os.makedirs(directory, exist_ok=True)
+
+    geom, _ = airfoil_batch.construct_many(airfoil_batch.params_to_array(airfoils), EXPORT_RESOLUTION)
+    coordinates = cosine_resample(outline_from_geom(geom), points_per_side)
+
+    used = set() if overwrite else {os.path.splitext(file)[0].lower() for file in os.listdir(directory) if file.lower().endswith('.dat')}
+    file_names = [_file_name(directory, airfoil.infos['name'], used) for airfoil in airfoils]
+
+    def write(i):
+        points = normalize_coordinates(coordinates[i]) if normalize else coordinates[i]
+        write_selig(file_names[i], airfoils[i].infos['name'], points, overwrite)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(write, range(len(airfoils))))
+
+    logger.info(f"Exported {len(airfoils)} airfoils to {directory}")
+    return file_names
+
+def export_project_airfoils(directory, points_per_side=DEFAULT_POINTS_PER_SIDE, normalize=True, overwrite=False):
+    """Export every airfoil of the project as a Selig .dat file."""
+    return export_airfoils_to_selig(globals.PROJECT.project_airfoils, directory, points_per_side, normalize, overwrite=overwrite)
@@ -0,0 +1,152 @@
+'''
+
+Copyright (C) 2025 Jakub Kamyk
+
+This file is part of DAEDALUS.
+
+DAEDALUS is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 3 of the License, or
+(at your option) any later version.
+
+DAEDALUS is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+import argparse
+import logging
+import os
+import time
+
+import numpy as np
+
+from src.obj.section_properties import DESCRIPTOR_STATIONS, shape_descriptors
+from src.utils.airfoil_catalog import get_catalog
+
+logger = logging.getLogger(__name__)
+
+# Principal components the KD-tree works in, the candidates are re-ranked on the full descriptor
+SEARCH_COMPONENTS = 10
+
+# Candidates taken from the tree per requested result
+RERANK_FACTOR = 4
+
+# Library sections turned into descriptors at once, keeps the crossing arrays of thickness_camber() small
+DESCRIPTOR_CHUNK = 512
+
+# Indexes built by this process, keyed by library directory
+_indexes = {}
+
+class ShapeIndex:
+    """
+    Similarity index over the sections of an airfoil catalog.
+
+    Every section of the catalog shape store is reduced to its thickness and camber descriptor, the descriptors
+    are projected on their first principal components and put in a KD-tree. A query takes RERANK_FACTOR * k
+    candidates from the tree and orders them by the distance of the full descriptors.
+    """
+    def __init__(self, catalog, n_stations=DESCRIPTOR_STATIONS, n_components=SEARCH_COMPONENTS):
+        from scipy.spatial import cKDTree
+
+        start = time.perf_counter()
+        self.catalog = catalog
+        self.n_stations = n_stations
+        self.files = catalog.files()
+        self._shapes = catalog.shapes()
+
+        # The shape store is memory mapped, read it one chunk at a time
+        self.descriptors = np.empty((len(self.files), 2 * n_stations))
+        for i in range(0, len(self.files), DESCRIPTOR_CHUNK):
+            self.descriptors[i:i + DESCRIPTOR_CHUNK] = shape_descriptors(self._shapes[i:i + DESCRIPTOR_CHUNK], n_stations)[0]
+
+        self.mean = self.descriptors.mean(axis=0) if len(self.files) else np.zeros(2 * n_stations)
+        centered = self.descriptors - self.mean
+        n_components = min(n_components, *centered.shape)
+        self.components = np.linalg.svd(centered, full_matrices=False)[2][:n_components] if n_components else np.zeros((0, 2 * n_stations))
+        self._tree = cKDTree(centered @ self.components.T) if len(self.files) else None
+        logger.info(f"Shape index of {len(self.files)} sections built in {time.perf_counter() - start:.3f} s")
+
+    def __len__(self):
+        return len(self.files)
+
+    def is_current(self):
+        """False once the catalog was saved again and its shape store replaced."""
+        return self._shapes is self.catalog.shapes()
+
+    def query(self, descriptor, k=10, exclude=()):
+        """Up to k (distance, file, name) of the sections closest to a descriptor, skipping the files in exclude."""
+        if self._tree is None:
+            return []
+        n_candidates = min(len(self), RERANK_FACTOR * k + len(exclude))
+        _, candidates = self._tree.query((descriptor - self.mean) @ self.components.T, k=n_candidates)
+        candidates = np.atleast_1d(candidates)
+        distances = np.linalg.norm(self.descriptors[candidates] - descriptor, axis=1)
+        results = []
+        for i in candidates[np.argsort(distances, kind='stable')]:
+            file = self.files[i]
+            if file in exclude:
+                continue
+            results.append((float(np.linalg.norm(self.descriptors[i] - descriptor)), file, self.catalog.metadata(file)['name']))
+            if len(results) == k:
+                break
+        return results
+
+    def nearest_to_outline(self, outline, k=10, exclude=()):
+        """Sections closest to a closed (P, 2) outline."""
+        return self.query(shape_descriptors(np.asarray(outline)[None], self.n_stations)[0][0], k, exclude)
+
+    def nearest_to_airfoil(self, airfoil, k=10):
+        """Sections closest to the current geometry of a parametric Airfoil."""
+        from src.obj.section_properties import outline_from_geom
+
+        airfoil.update()
+        return self.nearest_to_outline(outline_from_geom(airfoil.geom)[0], k)
+
+    def nearest_to_file(self, file_name, k=10):
+        """Sections closest to a coordinate file; the file itself is left out when it belongs to the library."""
+        from src.utils.selig import read_coordinates
+
+        _, upper, lower = read_coordinates(file_name)
+        outline = np.hstack((upper[:, ::-1], lower)).T
+        exclude = ()
+        if os.path.dirname(os.path.abspath(file_name)) == self.catalog.directory:
+            exclude = (os.path.basename(file_name),)
+        return self.nearest_to_outline(outline, k, exclude)
+
+def get_shape_index(directory, refresh=False):
+    """
+    Shape index of a library directory, built once per process and again when its catalog changed.
+
+    With refresh the catalog is first brought in line with the directory.
+    """
+    catalog = get_catalog(directory)
+    if refresh:
+        catalog.update()
+    index = _indexes.get(catalog.directory)
+    if index is None or not index.is_current():
+        index = ShapeIndex(catalog)
+        _indexes[catalog.directory] = index
+    return index
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the sections of an airfoil library closest in shape to a coordinate file")
+    parser.add_argument('library', help="directory with Selig/Lednicer coordinate files")
+    parser.add_argument('file', help="coordinate file to compare with the library")
+    parser.add_argument('-k', type=int, default=10, help="number of results")
+    args = parser.parse_args(argv)
+
+    index = get_shape_index(args.library)
+    start = time.perf_counter()
+    results = index.nearest_to_file(args.file, args.k)
+    logger.info(f"Query answered in {1000 * (time.perf_counter() - start):.2f} ms")
+    for distance, file, name in results:
+        print(f"{distance:.5f}  {file}  {name}")
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
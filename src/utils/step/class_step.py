@@ -91,7 +91,7 @@ class BsplineWithKnots:
 
     def calc_the_length(self):
         
-        if self.spline != None:
+        if self.spline is not None:
             points = np.stack((self.spline), axis=-1)
             distances = np.linalg.norm(np.diff(points, axis=0), axis=1)
             curve_length = np.sum(distances)
@@ -20,6 +20,7 @@ along with DAEDALUS.  If not, see <http://www.gnu.org/licenses/>.
 '''
 import src.globals as globals
 import numpy as np
+from functools import lru_cache
 from scipy.interpolate import splprep, splev, interpolate, BSpline, interp1d
 
 def normalize(vector):
@@ -91,31 +92,111 @@ def CreateBSpline(const_points):
 
     return spline
 
-def CreateBSpline_3D(const_points, degree, resolution=None):
-    coords = [np.array(c) for c in const_points]
-    l = len(coords[0])  # number of control points
-    
-    # Safety: adjust degree if not enough points
-    degree = min(degree, l - 1)
-    
+def curve_sample_count(n_ctrl, resolution=None):
+    """Number of samples taken along a curve with n_ctrl control points for the given resolution."""
+    if resolution == None:
+        resolution = int(globals.DAEDALUS.preferences['general']['performance'])
+    return int(max(n_ctrl*resolution/100, resolution))
+
+@lru_cache(maxsize=64)
+def bspline_basis(n_ctrl, degree, n_samples):
+    """
+    Sampled basis matrix (n_samples, n_ctrl) of a clamped, uniform B-spline.
+
+    Knot vectors only depend on the control point count and degree and the sample count only on
+    the resolution, so the matrix is cached and evaluating a curve becomes basis @ control_points.
+    Old entries (e.g. from a previous performance setting) are evicted least-recently-used first.
+    """
+    degree = min(degree, n_ctrl - 1)
+
     # Knot vector for clamped B-spline
     t = np.concatenate((
-        np.zeros(degree),                   # start knots
-        np.linspace(0, 1, l - degree + 1),  # interior knots
-        np.ones(degree)                     # end knots
+        np.zeros(degree),                        # start knots
+        np.linspace(0, 1, n_ctrl - degree + 1),  # interior knots
+        np.ones(degree)                          # end knots
     ))
-    
-    tck = [t, coords, degree]
-    
-    # Sampling resolution
+    u = np.linspace(0, 1, n_samples, endpoint=True)
+
+    # Evaluating the spline with unit coefficients gives one basis function per control point
+    basis = np.array(splev(u, [t, list(np.eye(n_ctrl)), degree])).T
+    basis.setflags(write=False)
+    return basis
+
+def evaluate_bspline(const_points, degree, n_samples):
+    """Evaluate a clamped B-spline given as [xs, ys(, zs)] control points, returns array of the same layout."""
+    const_points = np.asarray(const_points, dtype=float)
+    basis = bspline_basis(const_points.shape[1], degree, n_samples)
+    return const_points @ basis.T
+
+def curve_tolerance(resolution=None):
+    """
+    Relative chord-height tolerance for adaptive curve sampling.
+
+    Chosen so that a curve sampled adaptively deviates from the true spline no more than the worst
+    segment of the uniform sampling at the same performance setting (error ~ 1/resolution^2).
+    """
     if resolution == None:
-        f = int(globals.DAEDALUS.preferences['general']['performance'])
-    else:
-        f = resolution
+        resolution = int(globals.DAEDALUS.preferences['general']['performance'])
+    return 0.25 / resolution**2
+
+def adaptive_bspline(const_points, degree, resolution=None, scale=None, max_depth=12):
+    """
+    Sample a clamped B-spline by recursive bisection until every chord deviates from the curve
+    by less than curve_tolerance() times scale (e.g. the airfoil chord, defaults to the control polygon size).
+
+    Flat regions end up with few points and strongly curved ones (leading edge) with many.
+    Returns an array in the [xs, ys(, zs)] layout of evaluate_bspline().
+    """
+    const_points = np.asarray(const_points, dtype=float)
+    n_ctrl = const_points.shape[1]
+    degree = min(degree, n_ctrl - 1)
+
+    t = np.concatenate((np.zeros(degree), np.linspace(0, 1, n_ctrl - degree + 1), np.ones(degree)))
+    tck = [t, list(const_points), degree]
+
+    if not scale:
+        scale = np.linalg.norm(np.ptp(const_points, axis=1))
+    tol = curve_tolerance(resolution) * (abs(scale) if scale else 1.0)
+    max_samples = 4 * curve_sample_count(n_ctrl, resolution)
+
+    u = np.linspace(0, 1, 2 * n_ctrl + 1)
+    points = np.array(splev(u, tck))
+
+    for _ in range(max_depth):
+        u_mid = (u[:-1] + u[1:]) / 2
+        mid = np.array(splev(u_mid, tck))
+
+        # Distance of each midpoint from its chord
+        chord = points[:, 1:] - points[:, :-1]
+        offset = mid - points[:, :-1]
+        chord_len2 = np.sum(chord**2, axis=0)
+        proj = np.sum(offset * chord, axis=0) / np.where(chord_len2 > 0, chord_len2, 1.0)
+        height = np.linalg.norm(offset - proj * chord, axis=0)
+
+        refine = height > tol
+        if not refine.any() or len(u) + refine.sum() > max_samples:
+            break
+
+        u = np.concatenate((u, u_mid[refine]))
+        points = np.concatenate((points, mid[:, refine]), axis=1)
+        order = np.argsort(u, kind='stable')
+        u = u[order]
+        points = points[:, order]
+
+    return points
+
+def CreateBSpline_3D(const_points, degree, resolution=None, scale=None):
+    coords = np.array([np.array(c, dtype=float) for c in const_points])
+    l = len(coords[0])  # number of control points
 
-    u3=np.linspace(0,1,(max(l*f/100,f)),endpoint=True)
-    
-    spline = splev(u3, tck)
+    # Curvature-adaptive sampling unless a fixed resolution is requested
+    if resolution == None and globals.DAEDALUS.adaptive_sampling():
+        return adaptive_bspline(coords, degree, scale=scale)
+
+    # Sampling resolution
+    n_samples = curve_sample_count(l, resolution)
+
+    spline = evaluate_bspline(coords, degree, n_samples)
 
     return spline
 
@@ -427,12 +427,7 @@ class MenuBar(QMenuBar):
                         
                         try:
                             
-                            globals.PROJECT.project_components[component_index].wings[wing_index].segments[segment_index-1].uv_grid = {
-                                'le': [],
-                                'ps': [],
-                                'ss': [],
-                                'te': []
-                            }
+                            globals.PROJECT.project_components[component_index].wings[wing_index].segments[segment_index-1].uv_grid.clear()
 
                             globals.PROJECT.project_components[component_index].wings[wing_index].segments[segment_index-1].surfaces = {
                                 'le': [],
@@ -448,16 +443,7 @@ class MenuBar(QMenuBar):
                                 'te': []
                             }
 
-                            globals.PROJECT.project_components[component_index].wings[wing_index].segments[segment_index-1].geom = {
-                                'le': [],
-                                'ps': [],
-                                'ss': [],
-                                'te': [],
-                                'le_ps': [],
-                                'te_ps': [],
-                                'le_ss': [],
-                                'te_ss': []
-                            }
+                            globals.PROJECT.project_components[component_index].wings[wing_index].segments[segment_index-1].geom.clear()
 
                             globals.PROJECT.project_components[component_index].wings[wing_index].segments[segment_index-1].update()
 
@@ -50,58 +50,31 @@ logger = logging.getLogger(__name__)
 
 #import sympy as sym
 def DataBase_info(default_loc):
-    default_loc = default_loc
-    os.chdir('data')
-    #storage = [f for f in os.listdir() if os.path.isfile(f)]
-    storage = os.listdir()
-    os.chdir(default_loc)
-    return storage
+    # Every file in the database, as before the catalog; DataBase_load() reports the ones that are not sections
+    return os.listdir('data')
 
 def DataBase_load(file, default_loc):
-    AirfoilCoord = []
-    UP_points = []
-    DW_points = []
+    from src.utils.airfoil_catalog import get_catalog
+
     logger.info("Loading airfoil from database...")
-    os.chdir('data')
-    logger.debug(os.getcwd())
     try:
-        with open(file) as file:
-            for line in file:
-                logger.debug(line)
-                if line.startswith("Name:"):
-                    airfoil_name = line.replace("Name:", '', 1)
-                try:
-                    x, y = map(float, line.split()) # split X and Y values into 
-                    AirfoilCoord.append([x,y])
-                except ValueError: # skip lines that dont contain numeric data
-                    continue
+        catalog = get_catalog('data')
+        airfoil_name = catalog.reference(file).infos['name']
+        UP_points, DW_points = catalog.coordinates(file, normalized=False)
     except FileNotFoundError:
         logger.error("No file found!")
         quit()
-    os.chdir(default_loc)
-            
-    np.array(AirfoilCoord)
+    except ValueError as e:
+        logger.error(f"{file} is not an airfoil file: {e}")
+        quit()
     logger.info("Chosen airfoils data read sucessfully!")
     logger.info("{} Coordinates".format(file))
-    #logger.debug(AirfoilCoord)
-    
-    i=0
-    while AirfoilCoord[i][1] >= 0:
-        UP_points.append(AirfoilCoord[i])
-        i=i+1
-
-    i=len(UP_points)-1
-    while i < len(AirfoilCoord):
-        DW_points.append(AirfoilCoord[i])
-        i=i+1
-    
-    
-    UP_points = np.array(UP_points)
-    UP_points = UP_points[::-1, :]
-    UP_points = UP_points.T
-    
-    DW_points = np.array(DW_points).T
-    
+
+    # Same layout as before the catalog: a list of [x, y] pairs in Selig order, TE -> upper -> LE -> lower -> TE,
+    # with the leading edge once; UP_points and DW_points are (2, n) arrays LE -> TE sharing that point
+    shared_le = np.array_equal(UP_points[:, 0], DW_points[:, 0])
+    AirfoilCoord = np.hstack((UP_points[:, ::-1], DW_points[:, 1:] if shared_le else DW_points)).T.tolist()
+
     return AirfoilCoord, UP_points, DW_points, airfoil_name
 
 def Convert(le_depth, te_depth, UP_points, DW_points):
@@ -0,0 +1,32 @@
+import numpy as np
+
+import src.obj.objects2D as objects2D
+from src.arfdes.fit_2_reference import reference_points
+from src.arfdes.tools_airfoil import SeligReference
+from src.obj.airfoil_batch import params_to_array
+from src.obj.curve_projection import airfoil_pieces, bernstein, orthogonal_error, project_points
+
+DENSE_SAMPLES = 20001
+
+def dense_distances(ctrl, points):
+    """Squared distance of every point to the closest of DENSE_SAMPLES samples per curve."""
+    t = np.linspace(0, 1, DENSE_SAMPLES)
+    samples = ctrl @ bernstein(t, ctrl.shape[-1] - 1).T
+    return ((samples[None] - points[:, None, :, None])**2).sum(axis=2).min(axis=(1, 2))
+
+def test_projection_matches_dense_sampling():
+    ctrl = airfoil_pieces(params_to_array([objects2D.Airfoil()])[0])
+    for name in ['CLARK_Y', 'E168', 'S1091', 'S1210', 'S1221', 'S1223']:
+        points = reference_points(SeligReference(f'src/data/{name}.txt'))
+        _, _, foot = project_points(ctrl, points)
+        distances = ((foot - points)**2).sum(axis=1)
+        # The dense samples can only be farther than the exact foot point, by at most their spacing
+        assert np.all(distances <= dense_distances(ctrl, points) + 1e-12), name
+
+def test_trailing_edge_point_of_s1223():
+    # Point 77 sat on a local minimum with 8 seeds, 4.9e-4 instead of 6.7e-5
+    row = params_to_array([objects2D.Airfoil()])[0]
+    points = reference_points(SeligReference('src/data/S1223.txt'))
+    _, _, foot = project_points(airfoil_pieces(row), points)
+    assert ((foot[77] - points[77])**2).sum() < 1e-4
+    assert abs(orthogonal_error(row, points) - 0.13367) < 1e-5